@@ -16,8 +16,11 @@ elif [[ $# -gt 0 ]]; then
     exit 1
 fi
 
+# if this fails with "No module named pytest" or "unrecognized arguments: -n"
+# you need to install pytest and pytest-xdist
+#    python3 -m pip install pytest pytest-xdist
 echo Testing...
-if ! ./test.py; then
+if ! python3 -m pytest -q -n auto; then
     echo "FAIL: tests"
     exit 1
 fi
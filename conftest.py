@@ -0,0 +1,117 @@
+import hashlib
+import os
+import pickle
+
+import pydantic
+import pytest
+
+import mgs
+import pathogen_properties
+import pathogens
+from pathogen_properties import by_taxids
+
+
+def _mgs_data_key() -> str:
+    # Identifies the parsed data: the parsing code, the modules defining the
+    # pickled types (SampleAttributes is a pydantic model), and the size and
+    # modification time of every input file.
+    key = hashlib.sha256()
+    for module in [mgs, pathogen_properties]:
+        with open(module.__file__, "rb") as inf:
+            key.update(inf.read())
+    key.update(pydantic.VERSION.encode())
+    for bioprojects in mgs.target_bioprojects.values():
+        for bioproject in bioprojects:
+            for fname in [
+                "sample-metadata.csv",
+                "hv_clade_counts.tsv",
+                "qc_basic_stats.tsv",
+            ]:
+                path = os.path.join(mgs.BIOPROJECTS_DIR, bioproject, fname)
+                stat = os.stat(path)
+                key.update(
+                    f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+                )
+    return key.hexdigest()
+
+
+# Loading the MGS data is the slow part of most tests that use it, so build
+# it once per session and share it.  Between sessions it's pickled into
+# pytest's cache (cleared by --cache-clear), keyed on the inputs.
+@pytest.fixture(scope="session")
+def mgs_data(request) -> mgs.MGSData:
+    # The cache isn't there when running with -p no:cacheprovider.
+    cache = getattr(request.config, "cache", None)
+    if cache is None:
+        return mgs.MGSData.from_repo()
+    cache_path = cache.mkdir("mgs") / f"{_mgs_data_key()}.pkl"
+    if cache_path.exists():
+        try:
+            with open(cache_path, "rb") as inf:
+                return pickle.load(inf)
+        except Exception:
+            # Unreadable, e.g. written by an older version of a class it
+            # holds; load the data again and overwrite it.
+            pass
+    data = mgs.MGSData.from_repo()
+    # Write under a temporary name so that parallel workers never read a
+    # partial file.
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as outf:
+        pickle.dump(data, outf)
+    os.replace(tmp_path, cache_path)
+    return data
+
+
+# (bioproject, enrichment) -> sample -> attributes, for every target
+# bioproject, so parametrized tests don't each filter the samples again.
+@pytest.fixture(scope="session")
+def bioproject_samples(mgs_data):
+    return {
+        (bioproject, enrichment): mgs_data.sample_attributes(
+            bioproject, enrichment=enrichment
+        )
+        for bioprojects in mgs.target_bioprojects.values()
+        for bioproject in bioprojects
+        for enrichment in [None, mgs.Enrichment.VIRAL]
+    }
+
+
+# Several tests look at every pathogen's estimates; build them once.
+@pytest.fixture(scope="session")
+def all_estimates():
+    return {
+        name: (pathogen.estimate_prevalences(), pathogen.estimate_incidences())
+        for name, pathogen in pathogens.pathogens.items()
+    }
+
+
+# (pathogen name, "prevalence" or "incidence") -> taxids -> estimates
+@pytest.fixture(scope="session")
+def by_taxids_map(all_estimates):
+    return {
+        (name, label): by_taxids(
+            pathogens.pathogens[name].pathogen_chars, estimates
+        )
+        for name, (prevalences, incidences) in all_estimates.items()
+        for label, estimates in [
+            ("prevalence", prevalences),
+            ("incidence", incidences),
+        ]
+    }
+
+
+# pathogen name -> [(predictor type, taxids, predictors)], in the same order
+# as pathogens.predictors_by_taxid().
+@pytest.fixture(scope="session")
+def predictors_by_pathogen(by_taxids_map):
+    return {
+        name: [
+            (predictor_type, taxids, predictors)
+            for predictor_type in ["incidence", "prevalence"]
+            for taxids, predictors in by_taxids_map[
+                name, predictor_type
+            ].items()
+        ]
+        for name in pathogens.pathogens
+    }
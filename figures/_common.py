@@ -0,0 +1,163 @@
+from pathlib import Path
+
+import matplotlib as mpl
+import matplotlib.patches as mpatches  # type: ignore
+import matplotlib.ticker as ticker  # type: ignore
+import matplotlib.transforms as transforms  # type: ignore
+import pandas as pd
+import seaborn as sns  # type: ignore
+
+
+def separate_viruses(ax) -> None:
+    yticks = ax.get_yticks()
+    ax.hlines(
+        [(y1 + y2) / 2 for y1, y2 in zip(yticks[:-1], yticks[1:])],
+        *ax.get_xlim(),
+        color="grey",
+        linewidth=0.3,
+        linestyle=":",
+    )
+
+
+def adjust_axes(ax, predictor_type: str) -> None:
+    yticks = ax.get_yticks()
+    # Y-axis is reflected
+    ax.set_ylim([max(yticks) + 0.5, min(yticks) - 0.5])
+    ax.tick_params(left=False)
+    ax.xaxis.set_major_formatter(ticker.FuncFormatter(format_func))
+    ax.spines["right"].set_visible(False)
+    ax.spines["top"].set_visible(False)
+    ax.spines["left"].set_visible(False)
+    ax.vlines(
+        ax.get_xticks()[1:-1],
+        *ax.get_ylim(),
+        color="grey",
+        linewidth=0.3,
+        linestyle=":",
+        zorder=-1,
+    )
+    ax.set_xlabel(
+        r"$\mathrm{RA}"
+        f"{predictor_type[0]}"
+        r"(1\%)$"
+        ": expected relative abundance at 1% "
+        f"{predictor_type} "
+    )
+    ax.set_ylabel("")
+
+
+def plot_violin(
+    ax,
+    data: pd.DataFrame,
+    plotting_order: pd.DataFrame,
+    y: str,
+    hatch_zero_counts: bool = True,
+    violin_scale=1.0,
+) -> None:
+    sns.violinplot(
+        ax=ax,
+        data=data,
+        x="log10ra",
+        y=y,
+        order=plotting_order[y].unique(),
+        hue="study",
+        hue_order=plotting_order.study.unique(),
+        inner=None,
+        linewidth=0.0,
+        density_norm="area",
+        width=0.9,
+        dodge=0.1,
+        common_norm=True,
+        cut=0,
+    )
+    x_min = ax.get_xlim()[0]
+    p95 = data.groupby([y, "study"])["log10ra"].quantile(0.95)
+    # Before changing appearance of violins below, drop rows with no fits
+    # from plotting_order (e.g. Crits-Christoph Influenza A and B), as no
+    # violins exist for them.
+    plotting_order = plotting_order[
+        pd.MultiIndex.from_frame(plotting_order[[y, "study"]]).isin(p95.index)
+    ]
+
+    rows = plotting_order[["viral_reads", "study", y]].itertuples(
+        index=False, name=None
+    )
+    for (num_reads, study, label), patches in zip(rows, ax.collections):
+        if 0 < num_reads < 10:
+            alpha = 0.5
+            patches.set_alpha(alpha)
+        elif num_reads > 10:
+            alpha = 1.0
+            patches.set_alpha(alpha)
+        # Stretch the violin about its midline when it is drawn, rather
+        # than rewriting its vertices.
+        y_mid = patches.get_paths()[0].vertices[0, 1]
+        patches.set_transform(
+            transforms.Affine2D()
+            .translate(0, -y_mid)
+            .scale(1, violin_scale)
+            .translate(0, y_mid)
+            + ax.transData
+        )
+        if (hatch_zero_counts) and (num_reads == 0):
+            color = patches.get_facecolor()
+            alpha = 0.0
+            y_max = y_mid + 0.03
+            y_min = y_mid - 0.03
+
+            x_max = p95[label, study]
+
+            rect = mpatches.Rectangle(
+                (x_min, y_min),
+                x_max - x_min,
+                y_max - y_min,
+                facecolor=color,
+                linewidth=0.0,
+                alpha=0.5,
+                fill=False,
+                hatch="|||",
+                edgecolor=color,
+            )
+            ax.add_patch(rect)
+            ax.plot([x_max], [y_mid], marker="|", markersize=3, color=color)
+            patches.set_alpha(alpha)
+
+
+def format_func(value, tick_number):
+    return r"$10^{{{}}}$".format(int(value))
+
+
+def count_viral_reads(
+    df: pd.DataFrame, by_location: bool = False
+) -> pd.DataFrame:
+    groups = [
+        "pathogen",
+        "tidy_name",
+        "predictor_type",
+        "study",
+        "nucleic_acid",
+        "selection_round",
+    ]
+    if by_location:
+        groups.append("location")
+    out = df.groupby(groups)[["viral_reads", "observed?"]].sum().reset_index()
+    # Group by predictor type too, so that counting across the full input
+    # gives the same totals as counting each predictor type separately.
+    by_tidy_name = out.groupby(["predictor_type", "tidy_name"])
+    out["reads_by_tidy_name"] = by_tidy_name.viral_reads.transform("sum")
+    out["samples_observed_by_tidy_name"] = by_tidy_name["observed?"].transform(
+        "sum"
+    )
+    return out
+
+
+def save_plot(fig, figdir: Path, name: str, dpi: int = 600) -> None:
+    # bbox_inches="tight" draws the whole figure just to measure it, once per
+    # format.  Measure once, at the output dpi, and reuse the box for both.
+    figure_dpi = fig.dpi
+    fig.set_dpi(dpi)
+    bbox = fig.get_tightbbox(fig.canvas.get_renderer())
+    fig.set_dpi(figure_dpi)
+    bbox = bbox.padded(mpl.rcParams["savefig.pad_inches"])
+    for ext in ["pdf", "png"]:
+        fig.savefig(figdir / f"{name}.{ext}", bbox_inches=bbox, dpi=dpi)
@@ -0,0 +1,69 @@
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from pathogens import pathogens
+
+MODEL_OUTPUT_DIR = Path("..") / "model_output"
+
+NUCLEIC_ACIDS = {
+    name: pathogen.pathogen_chars.na_type.value
+    for name, pathogen in pathogens.items()
+}
+SELECTION_ROUNDS = {
+    name: pathogen.pathogen_chars.selection.value
+    for name, pathogen in pathogens.items()
+}
+
+
+def study_name(study: str) -> str:
+    return {
+        "brinch": "Brinch",
+        "crits_christoph": "Crits-Christoph",
+        "rothman": "Rothman",
+        "spurbeck": "Spurbeck",
+    }[study]
+
+
+def process_fits(fits_df: pd.DataFrame) -> pd.DataFrame:
+    fits_df["study"] = fits_df.study.map(study_name)
+    ra = fits_df.ra_at_1in100.to_numpy(dtype=np.float64, copy=False)
+    fits_df["log10ra"] = np.log10(ra)
+    return fits_df
+
+
+def process_input(input_df: pd.DataFrame) -> pd.DataFrame:
+    input_df["study"] = input_df.study.map(study_name)
+    # TODO: Store these in the files instead?
+    input_df["nucleic_acid"] = input_df.pathogen.map(NUCLEIC_ACIDS)
+    input_df["selection_round"] = input_df.pathogen.map(SELECTION_ROUNDS)
+    input_df["observed?"] = input_df.viral_reads > 0
+    # For consistency between dataframes (TODO: fix that elsewhere)
+    input_df["location"] = input_df.fine_location
+    return input_df
+
+
+def load_cached(
+    name: str,
+    process: Callable[[pd.DataFrame], pd.DataFrame],
+) -> pd.DataFrame:
+    tsv = MODEL_OUTPUT_DIR / f"{name}.tsv"
+    cache = MODEL_OUTPUT_DIR / f"_cache_{name}_tsv.parquet"
+    # Only the parsed TSV is cached, so the processing above always runs and
+    # edits to it can't be masked by a stale cache.  Rebuild whenever the
+    # model has been refit since the cache was written.
+    if cache.exists() and cache.stat().st_mtime >= tsv.stat().st_mtime:
+        df = pd.read_parquet(cache, engine="pyarrow")
+    else:
+        df = pd.read_csv(tsv, sep="\t", engine="pyarrow")
+        df.to_parquet(cache, engine="pyarrow", compression="zstd")
+    return process(df)
+
+
+def load_processed() -> tuple[pd.DataFrame, pd.DataFrame]:
+    return (
+        load_cached("fits", process_fits),
+        load_cached("input", process_input),
+    )
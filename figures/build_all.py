@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+
+# Build the violin figures in one process, so they share imports, the
+# matplotlib font cache, and the processed model output.
+
+from pathlib import Path
+
+import fig_2
+import fig_s3
+
+
+def start() -> None:
+    figdir = Path("..") / "fig"
+    fig_2.start(figdir)
+    fig_s3.start(figdir)
+
+
+if __name__ == "__main__":
+    start()
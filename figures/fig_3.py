@@ -6,6 +6,7 @@ import matplotlib as mpl
 import matplotlib.patches as mpatches  # type: ignore
 import matplotlib.pyplot as plt  # type: ignore
 import matplotlib.ticker as ticker  # type: ignore
+import matplotlib.transforms as transforms  # type: ignore
 import numpy as np
 import pandas as pd
 import seaborn as sns  # type: ignore
@@ -13,6 +14,7 @@ from pathlib import Path
 
 sys.path.append("..")
 
+from _common import save_plot
 from pathogens import pathogens
 
 mpl.rcParams["pdf.fonttype"] = 42
@@ -54,6 +56,12 @@ def study_name(study: str) -> str:
     }[study]
 
 
+CRITS_CHRISTOPH = [
+    study_name("crits_christoph_unenriched"),
+    study_name("crits_christoph_panel"),
+]
+
+
 plt.rcParams["font.size"] = 8
 
 
@@ -160,12 +168,10 @@ def plot_violin(
         )
     ]
 
-    for num_reads, study, tidy_name, patches in zip(
-        plotting_order.viral_reads,
-        plotting_order.study,
-        plotting_order.tidy_name,
-        ax.collections,
-    ):
+    rows = plotting_order[["viral_reads", "study", "tidy_name"]].itertuples(
+        index=False, name=None
+    )
+    for (num_reads, study, tidy_name), patches in zip(rows, ax.collections):
         if num_reads == 0:
             alpha = 0.0
         elif 0 < num_reads < 10:
@@ -175,50 +181,55 @@ def plot_violin(
 
         patches.set_alpha(alpha)
 
-        for path in patches.get_paths():
-            y_mid = path.vertices[0, 1]
-            path.vertices[:, 1] = (
-                violin_scale * (path.vertices[:, 1] - y_mid) + y_mid
+        # Stretch the violin about its midline when it is drawn, rather
+        # than rewriting its vertices.
+        y_mid = patches.get_paths()[0].vertices[0, 1]
+        patches.set_transform(
+            transforms.Affine2D()
+            .translate(0, -y_mid)
+            .scale(1, violin_scale)
+            .translate(0, y_mid)
+            + ax.transData
+        )
+        if (hatch_zero_counts) and (num_reads == 0):
+            color = patches.get_facecolor()
+            y_max = y_mid + 0.03
+            y_min = y_mid - 0.03
+
+            x_max = np.percentile(
+                data[
+                    (data["tidy_name"] == tidy_name)
+                    & (data["study"].str.contains(study, case=False))
+                ]["log10ra"],
+                95,
             )
-            if (hatch_zero_counts) and (num_reads == 0):
-                color = patches.get_facecolor()
-                y_max = y_mid + 0.03
-                y_min = y_mid - 0.03
-
-                x_max = np.percentile(
-                    data[
-                        (data["tidy_name"] == tidy_name)
-                        & (data["study"].str.contains(study, case=False))
-                    ]["log10ra"],
-                    95,
-                )
 
-                rect = mpatches.Rectangle(
-                    (x_min, y_min),
-                    x_max - x_min,
-                    y_max - y_min,
-                    facecolor=color,
-                    linewidth=0.0,
-                    alpha=0.5,
-                    fill=False,
-                    hatch="|||",
-                    edgecolor=color,
-                )
+            rect = mpatches.Rectangle(
+                (x_min, y_min),
+                x_max - x_min,
+                y_max - y_min,
+                facecolor=color,
+                linewidth=0.0,
+                alpha=0.5,
+                fill=False,
+                hatch="|||",
+                edgecolor=color,
+            )
 
-                ax.add_patch(rect)
-
-                ax.plot(
-                    [x_max],
-                    [y_mid],
-                    marker="|",
-                    markersize=3,
-                    alpha=1,
-                    color=color,
-                    zorder=3,
-                    linestyle="None",  # Add this to ensure no line is drawn
-                )
+            ax.add_patch(rect)
+
+            ax.plot(
+                [x_max],
+                [y_mid],
+                marker="|",
+                markersize=3,
+                alpha=1,
+                color=color,
+                zorder=3,
+                linestyle="None",  # Add this to ensure no line is drawn
+            )
 
-                patches.set_alpha(alpha)
+            patches.set_alpha(alpha)
 
 
 def format_func(value, tick_number):
@@ -236,16 +247,12 @@ def plot_incidence(
     plot_violin(
         ax=ax,
         plot_order_dict=plot_order_dict,
-        data=data[
-            (data.predictor_type == predictor_type)
-            & (data.location == "Overall")
-            & ~(
-                (data.study.str.contains("Crits-Christoph", case=False))
-                & (data.pathogen == "influenza")
-            )
-        ],
+        data=data.query(
+            "predictor_type == @predictor_type and location == 'Overall'"
+            " and not (study in @CRITS_CHRISTOPH and pathogen == 'influenza')"
+        ),
         viral_reads=count_viral_reads(
-            input_data[input_data.predictor_type == predictor_type]
+            input_data.query("predictor_type == @predictor_type")
         ),
         y="tidy_name",
         sorting_order=[
@@ -288,12 +295,11 @@ def plot_prevalence(
     plot_violin(
         ax=ax,
         plot_order_dict=plot_order_dict,
-        data=data[
-            (data.predictor_type == predictor_type)
-            & (data.location == "Overall")
-        ],
+        data=data.query(
+            "predictor_type == @predictor_type and location == 'Overall'"
+        ),
         viral_reads=count_viral_reads(
-            input_data[input_data.predictor_type == predictor_type]
+            input_data.query("predictor_type == @predictor_type")
         ),
         y="tidy_name",
         sorting_order=[
@@ -377,15 +383,6 @@ def composite_figure(
     return fig
 
 
-def save_plot(fig, figdir: Path, name: str) -> None:
-    for ext in ["pdf", "png"]:
-        fig.savefig(
-            figdir / f"{name}.{ext}",
-            bbox_inches="tight",
-            dpi=600,
-        )
-
-
 def start() -> None:
     parent_dir = Path("..")
     figdir = Path(parent_dir / "fig")
@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 
-import csv
 import os
-from dataclasses import dataclass
 from pathlib import Path
 import matplotlib.pyplot as plt  # type: ignore
 import numpy as np
+import pandas as pd
+from _common import save_plot
 from matplotlib.lines import Line2D  # type: ignore
 from scipy.stats import gmean
 
@@ -30,6 +30,14 @@ CUM_INC_1_PERC = 0.01
 CUM_INC_001_PERC = 0.0001
 DETECTION_THRESHOLD = 100
 
+SEQUENCERS = ["NovaSeq (lane)", "NovaSeq (cell)", "MiSeq", "NextSeq"]
+SEQUENCER_COSTS = np.array(
+    [NOVASEQ_LANE_COST, NOVASEQ_CELL_COST, MISEQ_COST, NEXTSEQ_COST]
+)
+SEQUENCER_DEPTHS = np.array(
+    [NOVASEQ_LANE_DEPTH, NOVASEQ_CELL_DEPTH, MISEQ_DEPTH, NEXTSEQ_DEPTH]
+)
+
 study_labels = {
     "spurbeck": "Spurbeck",
     "crits_christoph": "Crits-Christoph",
@@ -37,50 +45,28 @@ study_labels = {
 }
 
 
-@dataclass
-class SummaryStats:
-    mean: float
-    std: float
-    min: float
-    percentiles: dict[int, float]
-    max: float
-
-
-def read_data() -> dict[tuple[str, str, str, str], SummaryStats]:
-    data = {}
-    with open(
-        os.path.join("..", MODEL_OUTPUT_DIR, "fits_summary.tsv")
-    ) as datafile:
-        reader = csv.DictReader(datafile, delimiter="\t")
-        for row in reader:
-            virus = row["tidy_name"]
-            study = row["study"]
-            location = row["location"]
-            enriched = False
-            data[virus, study, location, enriched] = SummaryStats(
-                mean=float(row["mean"]),
-                std=float(row["std"]),
-                min=float(row["min"]),
-                percentiles={p: float(row[f"{p}%"]) for p in PERCENTILES},
-                max=float(row["max"]),
-            )
-    with open(
-        os.path.join("..", MODEL_OUTPUT_DIR, "panel_fits_summary.tsv")
-    ) as datafile:
-        reader = csv.DictReader(datafile, delimiter="\t")
-        for row in reader:
-            virus = row["tidy_name"]
-            study = row["study"]
-            location = row["location"]
-            enriched = True
-            data[virus, study, location, enriched] = SummaryStats(
-                mean=float(row["mean"]),
-                std=float(row["std"]),
-                min=float(row["min"]),
-                percentiles={p: float(row[f"{p}%"]) for p in PERCENTILES},
-                max=float(row["max"]),
-            )
-    return data
+def read_data() -> pd.DataFrame:
+    # Percentiles of the fitted RA, indexed by
+    # (tidy_name, study, location, enriched).
+    frames = []
+    for filename, enriched in [
+        ("fits_summary.tsv", False),
+        ("panel_fits_summary.tsv", True),
+    ]:
+        frames.append(
+            pd.read_csv(
+                os.path.join("..", MODEL_OUTPUT_DIR, filename),
+                sep="\t",
+                engine="pyarrow",
+                usecols=["tidy_name", "study", "location"]
+                + [f"{p}%" for p in PERCENTILES],
+            ).assign(enriched=enriched)
+        )
+    return (
+        pd.concat(frames)
+        .set_index(["tidy_name", "study", "location", "enriched"])
+        .sort_index()
+    )
 
 
 def plot_lines(
@@ -111,7 +97,7 @@ def plot_lines(
 
 
 def get_reads_required(
-    data=dict,
+    data=pd.DataFrame,
     cumulative_incidence=int,
     detection_threshold=np.ndarray,
     virus=str,
@@ -120,66 +106,46 @@ def get_reads_required(
     study=str,
     enriched=bool,
 ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
-    stats = data[virus, study, location, enriched]
+    stats = data.loc[(virus, study, location, enriched)]
 
     median_reads = detection_threshold / (
-        100 * stats.percentiles[50] * cumulative_incidence
+        100 * stats["50%"] * cumulative_incidence
     )
     lower_reads = detection_threshold / (
-        100 * stats.percentiles[5] * cumulative_incidence
+        100 * stats["5%"] * cumulative_incidence
     )
     upper_reads = detection_threshold / (
-        100 * stats.percentiles[95] * cumulative_incidence
+        100 * stats["95%"] * cumulative_incidence
     )
 
     return median_reads, lower_reads, upper_reads
 
 
-def save_plot(fig, figdir: Path, name: str) -> None:
-    for ext in ["pdf", "png"]:
-        fig.savefig(figdir / f"{name}.{ext}", bbox_inches="tight", dpi=600)
-
-
-def get_depth_and_costs():
-    novaseq_lane_costs = [NOVASEQ_LANE_COST]
-    novaseq_lane_depth = [0]
-    novaseq_cell_costs = [NOVASEQ_CELL_COST]
-    novaseq_cell_depth = [0]
-    miseq_costs = [MISEQ_COST]
-    miseq_depth = [0]
-    nextseq_costs = [NEXTSEQ_COST]
-    nextseq_depth = [0]
-    for i in range(1, 1000000):
-        novaseq_lane_costs.append(i * NOVASEQ_LANE_COST)
-        novaseq_lane_depth.append(i * NOVASEQ_LANE_DEPTH)
-        novaseq_cell_costs.append(i * NOVASEQ_CELL_COST)
-        novaseq_cell_depth.append(i * NOVASEQ_CELL_DEPTH)
-        miseq_costs.append(i * MISEQ_COST)
-        miseq_depth.append(i * MISEQ_DEPTH)
-        nextseq_costs.append(i * NEXTSEQ_COST)
-        nextseq_depth.append(i * NEXTSEQ_DEPTH)
-
-    return (
-        novaseq_lane_costs,
-        novaseq_lane_depth,
-        novaseq_cell_costs,
-        novaseq_cell_depth,
-        miseq_costs,
-        miseq_depth,
-        nextseq_costs,
-        nextseq_depth,
+def get_depth_and_costs(
+    unit_depth: float, unit_cost: float, max_depth: float, max_cost: float
+) -> tuple[np.ndarray, np.ndarray]:
+    # Step i covers i units of sequencing; the first step is priced as one
+    # unit so the curve starts at the minimum cost of a run.  Only build the
+    # steps that can land inside the plotted depth and cost range.
+    num_steps = min(
+        np.ceil(max_depth / unit_depth), np.ceil(max_cost / unit_cost)
     )
+    units = np.arange(num_steps + 2)
+    costs = units * unit_cost
+    costs[0] = unit_cost
+    return units * unit_depth, costs
 
 
 def get_cost(virus, cumulative_incidence):
-    seq_depths = {}
-
-    for study in study_labels:
-        for enriched in [True, False]:
-            if study == "spurbeck" and enriched == True:
-                continue
-
-            seq_depths[virus, study, enriched] = get_reads_required(
+    keys = [
+        (virus, study, enriched)
+        for study in study_labels
+        for enriched in [True, False]
+        if not (study == "spurbeck" and enriched)
+    ]
+    seq_depths = np.array(
+        [
+            get_reads_required(
                 data,
                 cumulative_incidence,
                 DETECTION_THRESHOLD,
@@ -191,36 +157,24 @@ def get_cost(virus, cumulative_incidence):
             )[
                 0
             ]  # Only take median value
+            for _, study, enriched in keys
+        ]
+    )
 
-    seq_costs = {}
-    for (virus, study, enriched), depth in seq_depths.items():
-        nova_seq_lane_cost = NOVASEQ_LANE_COST * np.ceil(
-            depth / NOVASEQ_LANE_DEPTH
-        )
-        nova_seq_cell_cost = NOVASEQ_CELL_COST * np.ceil(
-            depth / NOVASEQ_CELL_DEPTH
-        )
-        miseq_cost = MISEQ_COST * np.ceil(depth / MISEQ_DEPTH)
-        nextseq_cost = NEXTSEQ_COST * np.ceil(depth / NEXTSEQ_DEPTH)
-        lowest_cost = min(
-            nova_seq_lane_cost,
-            nova_seq_cell_cost,
-            miseq_cost,
-            nextseq_cost,
-        )
+    # Cost of buying enough runs on each sequencer: one row per key, one
+    # column per sequencer.
+    costs = (
+        np.ceil(seq_depths[:, np.newaxis] / SEQUENCER_DEPTHS) * SEQUENCER_COSTS
+    )
+    cheapest = costs.argmin(axis=1)
 
-        cost = lowest_cost
-        sequencer = (
-            "NovaSeq (lane)"
-            if lowest_cost == nova_seq_lane_cost
-            else (
-                "NovaSeq (cell)"
-                if lowest_cost == nova_seq_cell_cost
-                else ("MiSeq" if lowest_cost == miseq_cost else "NextSeq")
-            )
+    seq_costs = {}
+    for i, key in enumerate(keys):
+        seq_costs[key] = (
+            SEQUENCERS[cheapest[i]],
+            costs[i, cheapest[i]],
+            seq_depths[i],
         )
-
-        seq_costs[virus, study, enriched] = (sequencer, cost, depth)
     return seq_costs
 
 
@@ -356,6 +310,8 @@ def plot_fig_s8(fig, gs):
 
     Y_MIN = 10**2
     Y_MAX = 10**8
+    X_MIN = 10**2
+    X_MAX = 10**14
 
     fig.text(
         0.05,
@@ -365,55 +321,28 @@ def plot_fig_s8(fig, gs):
         fontweight="bold",
     )
 
-
     i = 0
     for virus in ["Norovirus (GII)", "SARS-COV-2"]:
         for cumulative_incidence in [CUM_INC_1_PERC, CUM_INC_001_PERC]:
             ax = axs[i]
 
-            (
-                novaseq_lane_costs,
-                novaseq_lane_depth,
-                novaseq_cell_costs,
-                novaseq_cell_depth,
-                miseq_costs,
-                miseq_depth,
-                nextseq_costs,
-                nextseq_depth,
-            ) = get_depth_and_costs()
-
-            ax.step(
-                miseq_depth,
-                miseq_costs,
-                where="pre",
-                color="black",
-                linestyle="-.",
-                linewidth=1,
-            )
-            ax.step(
-                novaseq_lane_depth,
-                novaseq_lane_costs,
-                where="pre",
-                color="black",
-                linestyle="--",
-                linewidth=1,
-            )
-            ax.step(
-                nextseq_depth,
-                nextseq_costs,
-                where="pre",
-                color="black",
-                linestyle="-",
-                linewidth=1,
-            )
-            ax.step(
-                novaseq_cell_depth,
-                novaseq_cell_costs,
-                where="pre",
-                color="black",
-                linestyle=":",
-                linewidth=1,
-            )
+            for unit_depth, unit_cost, linestyle in [
+                (MISEQ_DEPTH, MISEQ_COST, "-."),
+                (NOVASEQ_LANE_DEPTH, NOVASEQ_LANE_COST, "--"),
+                (NEXTSEQ_DEPTH, NEXTSEQ_COST, "-"),
+                (NOVASEQ_CELL_DEPTH, NOVASEQ_CELL_COST, ":"),
+            ]:
+                depth, costs = get_depth_and_costs(
+                    unit_depth, unit_cost, X_MAX, Y_MAX
+                )
+                ax.step(
+                    depth,
+                    costs,
+                    where="pre",
+                    color="black",
+                    linestyle=linestyle,
+                    linewidth=1,
+                )
 
             seq_costs = get_cost(virus, cumulative_incidence)
 
@@ -491,9 +420,8 @@ def plot_fig_s8(fig, gs):
                     10**y, color="black", alpha=0.2, ls="--", linewidth=0.3
                 )
 
-            _, x_max = ax.get_xlim()
             x_tick_positions = []
-            for x in np.arange(2, np.ceil(np.log10(x_max)), 2):
+            for x in np.arange(np.log10(X_MIN), np.log10(X_MAX) + 1, 2):
                 x_tick = 10**x
                 ax.axvline(
                     x_tick, color="black", alpha=0.2, ls="--", linewidth=0.3
@@ -503,7 +431,7 @@ def plot_fig_s8(fig, gs):
             ax.set_xticks(x_tick_positions)
             ax.tick_params(axis="both", which="major", labelsize=8)
             ax.tick_params(axis="both", which="minor", length=0)
-            ax.set_xlim(1e2, 1e14)
+            ax.set_xlim(X_MIN, X_MAX)
             ax.set_ylim(Y_MIN, Y_MAX)
 
             ax.spines["top"].set_visible(False)
@@ -11,7 +11,12 @@ MODEL_OUTPUT_DIR = "model_output"
 
 
 def summarize_output(coeffs: pd.DataFrame) -> pd.DataFrame:
-    return coeffs.groupby(
+    # Same columns as describe(), but with a single grouped pass per
+    # statistic and one grouped quantile call for all the percentiles.
+    # Sorting the few hundred summary rows afterwards is cheaper than having
+    # groupby sort its keys.
+    percentiles = [0.05, 0.25, 0.5, 0.75, 0.95]
+    ra = coeffs.groupby(
         [
             "pathogen",
             "tidy_name",
@@ -19,8 +24,15 @@ def summarize_output(coeffs: pd.DataFrame) -> pd.DataFrame:
             "predictor_type",
             "study",
             "location",
-        ]
-    ).ra_at_1in100.describe(percentiles=[0.05, 0.25, 0.5, 0.75, 0.95])
+        ],
+        sort=False,
+    ).ra_at_1in100
+    summary = ra.agg(["count", "mean", "std", "min"]).astype({"count": float})
+    quantiles = ra.quantile(percentiles).unstack()
+    quantiles.columns = [f"{p:.0%}" for p in percentiles]
+    summary = summary.join(quantiles)
+    summary["max"] = ra.max()
+    return summary.sort_index()
 
 
 def start(num_samples: int, plot: bool) -> None:
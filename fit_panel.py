@@ -1,37 +1,81 @@
 #!/usr/bin/env python3
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Optional
 
 import pandas as pd
 import os
 import stats
+from fit import summarize_output
 from mgs import Enrichment, MGSData, target_bioprojects
 from pathogens import predictors_by_taxid
 
 MODEL_OUTPUT_DIR = "model_output"
 
 
-def summarize_output(coeffs: pd.DataFrame) -> pd.DataFrame:
-    return coeffs.groupby(
-        [
-            "pathogen",
-            "tidy_name",
-            "taxids",
-            "predictor_type",
-            "study",
-            "location",
-        ]
-    ).ra_at_1in100.describe(percentiles=[0.05, 0.25, 0.5, 0.75, 0.95])
+def default_max_workers(num_chains: int) -> int:
+    # Every Stan chain is its own process, so run only as many fits at once
+    # as there are CPUs for all of their chains.
+    return max(1, (os.cpu_count() or 1) // num_chains)
 
 
-def start(num_samples: int, plot: bool) -> None:
+def _fit_one(
+    job: tuple,
+) -> tuple[str, float, pd.DataFrame, pd.DataFrame]:
+    (
+        pathogen_name,
+        tidy_name,
+        predictor_type,
+        taxids,
+        study,
+        data,
+        num_chains,
+        num_samples,
+        plot,
+        figdir,
+    ) = job
+    model = stats.Model(data=data, random_seed=sum(taxids))
+    model.fit_model(num_chains=num_chains, num_samples=num_samples)
+
+    if plot:
+        taxid_str = "-".join(str(tid) for tid in taxids)
+        model.plot_figures(
+            path=figdir,
+            prefix=f"{pathogen_name}-{taxid_str}-{predictor_type}-{study}",
+        )
+    metadata = dict(
+        pathogen=pathogen_name,
+        tidy_name=tidy_name,
+        taxids="_".join(str(t) for t in taxids),
+        predictor_type=predictor_type,
+        study=study,
+    )
+    return (
+        f"{study}, {tidy_name}",
+        model.get_rhat(),
+        model.input_df.assign(**metadata),
+        model.get_coefficients().assign(**metadata),
+    )
+
+
+def start(
+    num_samples: int,
+    plot: bool,
+    max_workers: Optional[int] = None,
+    plot_every: int = 1,
+    num_chains: int = 4,
+) -> None:
+    if plot_every < 1:
+        raise ValueError(f"plot_every must be at least 1, got {plot_every}")
     figdir = os.path.join(MODEL_OUTPUT_DIR, "model_panel_fig")
     if plot:
         os.makedirs(figdir, exist_ok=True)
-    mgs_data = MGSData.from_repo()
-    input_data = []
-    output_data = []
-    study_pathogen_rhats = {}
 
+    # Parse the MGS data once, here, and give each job just the data points
+    # for its model.  Models without any predictors are dropped up front, so
+    # every job is a fit.
+    mgs_data = MGSData.from_repo()
+    jobs = []
     for (
         pathogen_name,
         tidy_name,
@@ -39,43 +83,51 @@ def start(num_samples: int, plot: bool) -> None:
         taxids,
         predictors,
     ) in predictors_by_taxid():
-        taxids_str = "_".join(str(t) for t in taxids)
         for study, bioprojects in target_bioprojects.items():
             if study in ["brinch", "spurbeck"]:
                 print(f"Skipping {study} for {pathogen_name}")
                 continue
-            enrichment = Enrichment.PANEL
-            model = stats.build_model(
+            data = stats.build_data(
                 mgs_data,
                 bioprojects,
                 predictors,
                 taxids,
-                random_seed=sum(taxids),
-                enrichment=enrichment,
+                enrichment=Enrichment.PANEL,
             )
-            if model is None:
+            if data is None:
                 continue
-
-            model.fit_model(num_samples=num_samples)
-
-            rhat = model.get_rhat()
-            study_pathogen_rhats[f"{study}, {tidy_name}"] = rhat
-
-            if plot:
-                taxid_str = "-".join(str(tid) for tid in taxids)
-                model.plot_figures(
-                    path=figdir,
-                    prefix=f"{pathogen_name}-{taxid_str}-{predictor_type}-{study}",
+            # Figures are slow to render; with plot_every=n only every nth
+            # fitted model gets them, which is plenty for spot-checking a
+            # rerun.  The worker renders them, as only it has the fit.
+            plot_this = plot and len(jobs) % plot_every == 0
+            jobs.append(
+                (
+                    pathogen_name,
+                    tidy_name,
+                    predictor_type,
+                    taxids,
+                    study,
+                    data,
+                    num_chains,
+                    num_samples,
+                    plot_this,
+                    figdir,
                 )
-            metadata = dict(
-                pathogen=pathogen_name,
-                tidy_name=tidy_name,
-                taxids=taxids_str,
-                predictor_type=predictor_type,
-                study=study,
             )
-            input_data.append(model.input_df.assign(**metadata))
-            output_data.append(model.get_coefficients().assign(**metadata))
+
+    # The fits are independent, so run them in parallel.  map() keeps
+    # results in job order, so the output files match a sequential run.
+    input_data = []
+    output_data = []
+    study_pathogen_rhats = {}
+    if max_workers is None:
+        max_workers = default_max_workers(num_chains)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for result in executor.map(_fit_one, jobs):
+            pathogen_and_study, rhat, input_df, coeffs = result
+            study_pathogen_rhats[pathogen_and_study] = rhat
+            input_data.append(input_df)
+            output_data.append(coeffs)
 
     input = pd.concat(input_data)
     input.to_csv(
@@ -100,4 +152,10 @@ def start(num_samples: int, plot: bool) -> None:
 
 if __name__ == "__main__":
     # TODO: Command line arguments
-    start(num_samples=8000, plot=True)
+    num_chains = 4
+    start(
+        num_samples=8000,
+        plot=True,
+        max_workers=default_max_workers(num_chains),
+        num_chains=num_chains,
+    )
@@ -5,6 +5,7 @@ from collections.abc import Iterable
 from dataclasses import dataclass
 from datetime import date
 from enum import Enum
+from functools import cache
 from typing import NewType, Optional
 from collections import defaultdict
 import os
@@ -190,54 +191,69 @@ def parse_metadata(record, paper):
 
 SampleCounts = dict[TaxID, dict[Sample, int]]
 
-metadata_bioprojects = {}
-metadata_samples = {}
-sample_counts = defaultdict(Counter) # taxid -> sample -> clade count
-for paper, bioprojects in target_bioprojects.items():
-    for bioproject in bioprojects:
-        samples = []
-        with open(
-            os.path.join(BIOPROJECTS_DIR, bioproject, "sample-metadata.csv")
-        ) as inf:
-            for i, record in enumerate(csv.reader(inf)):
-                if i == 0:
-                    continue
-                sample, sample_attributes = parse_metadata(record, paper)
-                samples.append(sample)
-                metadata_samples[sample] = sample_attributes
-        metadata_bioprojects[bioproject] = samples
-        with open(
-            os.path.join(BIOPROJECTS_DIR, bioproject, "hv_clade_counts.tsv")
-        ) as inf:
-            for i, row in enumerate(inf):
-                if i == 0:
-                    continue
-                (
-                    taxid,
-                    name,
-                    rank,
-                    parent_taxid,
-                    sample,
-                    n_reads_direct,
-                    n_reads_clade,
-                ) = row.rstrip("\n").split("\t")
-                taxid = int(taxid)
-                n_reads_clade = int(n_reads_clade)
-                if n_reads_clade:
-                    sample_counts[taxid][sample] = n_reads_clade
-        with open(
-            os.path.join(BIOPROJECTS_DIR, bioproject, "qc_basic_stats.tsv")
-        ) as inf:
-            for i, row in enumerate(inf):
-                row = row.rstrip("\n").split("\t")
 
-                if i == 0:
-                    cols = row
-                    continue
-
-                metadata_samples[row[cols.index("sample")]].reads = int(
-                    row[cols.index("n_read_pairs")]
+# Parsing every bioproject's files is slow, so it happens the first time the
+# data is asked for rather than whenever mgs is imported.
+@cache
+def load_data() -> tuple[
+    dict[BioProject, list[Sample]],
+    dict[Sample, SampleAttributes],
+    SampleCounts,
+]:
+    metadata_bioprojects = {}
+    metadata_samples = {}
+    sample_counts = defaultdict(Counter)  # taxid -> sample -> clade count
+    for paper, bioprojects in target_bioprojects.items():
+        for bioproject in bioprojects:
+            samples = []
+            with open(
+                os.path.join(
+                    BIOPROJECTS_DIR, bioproject, "sample-metadata.csv"
+                )
+            ) as inf:
+                for i, record in enumerate(csv.reader(inf)):
+                    if i == 0:
+                        continue
+                    sample, sample_attributes = parse_metadata(record, paper)
+                    samples.append(sample)
+                    metadata_samples[sample] = sample_attributes
+            metadata_bioprojects[bioproject] = samples
+            with open(
+                os.path.join(
+                    BIOPROJECTS_DIR, bioproject, "hv_clade_counts.tsv"
                 )
+            ) as inf:
+                for i, row in enumerate(inf):
+                    if i == 0:
+                        continue
+                    (
+                        taxid,
+                        name,
+                        rank,
+                        parent_taxid,
+                        sample,
+                        n_reads_direct,
+                        n_reads_clade,
+                    ) = row.rstrip("\n").split("\t")
+                    taxid = int(taxid)
+                    n_reads_clade = int(n_reads_clade)
+                    if n_reads_clade:
+                        sample_counts[taxid][sample] = n_reads_clade
+            with open(
+                os.path.join(BIOPROJECTS_DIR, bioproject, "qc_basic_stats.tsv")
+            ) as inf:
+                for i, row in enumerate(inf):
+                    row = row.rstrip("\n").split("\t")
+
+                    if i == 0:
+                        cols = row
+                        continue
+
+                    metadata_samples[row[cols.index("sample")]].reads = int(
+                        row[cols.index("n_read_pairs")]
+                    )
+    return metadata_bioprojects, metadata_samples, sample_counts
+
 
 @dataclass
 class MGSData:
@@ -247,6 +263,7 @@ class MGSData:
 
     @staticmethod
     def from_repo():
+        metadata_bioprojects, metadata_samples, sample_counts = load_data()
         return MGSData(
             bioprojects=metadata_bioprojects,
             sample_attrs=metadata_samples,
@@ -8,6 +8,7 @@ import re
 from collections.abc import Iterable
 from dataclasses import InitVar, dataclass, field
 from enum import Enum
+from functools import cache
 from typing import NewType, Optional
 
 import numpy as np
@@ -75,12 +76,15 @@ class PathogenChars:
             object.__setattr__(self, "taxids", frozenset([taxid]))
 
 
+# Called for every end date given as a bare year or month, but there are only
+# around a hundred distinct (year, month) pairs.
+@cache
 def days_in_month(year: int, month: int) -> int:
     _, last_day = calendar.monthrange(year, month)
     return last_day
 
 
-@dataclass(kw_only=True, eq=True, frozen=True)
+@dataclass(kw_only=True, eq=True, frozen=True, slots=True)
 class Variable:
     """An external piece of data"""
 
@@ -264,7 +268,7 @@ class Variable:
         )
 
 
-@dataclass(kw_only=True, eq=True, frozen=True)
+@dataclass(kw_only=True, eq=True, frozen=True, slots=True)
 class Taggable(Variable):
     # In cases where the location and date isn't enough to identify the
     # population, you can set a more specific tag to reduce errors.  For
@@ -290,7 +294,7 @@ class Taggable(Variable):
         assert v1.tag == v2.tag
 
 
-@dataclass(kw_only=True, eq=True, frozen=True)
+@dataclass(kw_only=True, eq=True, frozen=True, slots=True)
 class Scalar(Variable):
     scalar: float
 
@@ -300,11 +304,14 @@ class Scalar(Variable):
 
 
 class Predictor(abc.ABC, Variable):
+    # Keep subclasses slotted: without this they'd each get a __dict__ again.
+    __slots__ = ()
+
     @abc.abstractmethod
     def get_data(self) -> float: ...
 
 
-@dataclass(kw_only=True, eq=True, frozen=True)
+@dataclass(kw_only=True, eq=True, frozen=True, slots=True)
 class Population(Taggable):
     """A number of people"""
 
@@ -327,7 +334,7 @@ class Population(Taggable):
         )
 
 
-@dataclass(kw_only=True, eq=True, frozen=True)
+@dataclass(kw_only=True, eq=True, frozen=True, slots=True)
 class Prevalence(Predictor):
     """What fraction of people have this pathogen at some moment"""
 
@@ -399,7 +406,7 @@ class Prevalence(Predictor):
         )
 
 
-@dataclass(kw_only=True, eq=True, frozen=True)
+@dataclass(kw_only=True, eq=True, frozen=True, slots=True)
 class PrevalenceAbsolute(Taggable):
     """How many people had this pathogen at some moment"""
 
@@ -427,7 +434,7 @@ class PrevalenceAbsolute(Taggable):
         )
 
 
-@dataclass(kw_only=True, eq=True, frozen=True)
+@dataclass(kw_only=True, eq=True, frozen=True, slots=True)
 class Number(Variable):
     """Generic number.  Use this for weird one-off things
 
@@ -445,7 +452,7 @@ class Number(Variable):
         )
 
 
-@dataclass(kw_only=True, eq=True, frozen=True)
+@dataclass(kw_only=True, eq=True, frozen=True, slots=True)
 class IncidenceRate(Predictor):
     """What fraction of people get this pathogen annually"""
 
@@ -484,7 +491,7 @@ class IncidenceRate(Predictor):
         )
 
 
-@dataclass(kw_only=True, eq=True, frozen=True)
+@dataclass(kw_only=True, eq=True, frozen=True, slots=True)
 class IncidenceAbsolute(Taggable):
     """How many people get this pathogen annually"""
 
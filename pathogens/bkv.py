@@ -1,5 +1,3 @@
-import dataclasses
-
 from pathogen_properties import *
 
 background = """BK virus is a common virus which has minimal impact in
@@ -67,18 +65,17 @@ us_2007_seroprevalence = Prevalence(
 
 
 def estimate_prevalences() -> list[Prevalence]:
-    # BK Virus has no clinical relevance for most individuals, and is not
-    # targeted by treatments or vaccines. We can thus extrapolate 2007 data to
-    # 2019-2021.
-
-    us_2020 = dataclasses.replace(
-        us_2007_seroprevalence, date_source=Variable(date="2020")
-    )
-    us_2021 = dataclasses.replace(
-        us_2007_seroprevalence, date_source=Variable(date="2021")
-    )
-    # Due to a lack of polyomavirus prevalence data for Denmark, we
-    # extrapolate Swiss data from 2009 to Denmark, 2015-2018.
+    # Not included due to being a Group 2 virus (i.e., a virus we picked once
+    # we saw it was high relative abundance in sequencing data. This post-hoc
+    # selection is hard to explain and doesn't add much to the results due to
+    # the connnected selection bias.)
+    #
+    # If it were included: BK Virus has no clinical relevance for most
+    # individuals, and is not targeted by treatments or vaccines, so we would
+    # extrapolate us_2007_seroprevalence to 2020-2021.
+    #
+    # Due to a lack of polyomavirus prevalence data for Denmark, we would
+    # extrapolate ch_2009_seroprevalence to Denmark, 2015-2018.
     # Originally we intended to use the same Dutch study as used in mcv.py:
     # https://journals.plos.org/plosone/article?id=10.1371/journal.pone.0206273#pone.0206273.ref024:~:text=Table%202.%20Seropositivity%20numbers%20and%20seroprevalence."
     # Table 2, row 1, column 1.
@@ -86,30 +83,6 @@ def estimate_prevalences() -> list[Prevalence]:
     # found evidence for crossreactivity between JC Virus and BK Virus,
     # potentially leading to seroprevalence measurements that are
     # overestimates. https://journals.asm.org/doi/full/10.1128/jcm.01566-17#:~:text=Preincubation%20with%20JCPyV,S6B1%20and%20B3).
-    dk_2015 = dataclasses.replace(
-        ch_2009_seroprevalence,
-        date_source=Variable(date="2015"),
-        location_source=Variable(country="Denmark"),
-    )
-    dk_2016 = dataclasses.replace(
-        ch_2009_seroprevalence,
-        date_source=Variable(date="2016"),
-        location_source=Variable(country="Denmark"),
-    )
-    dk_2017 = dataclasses.replace(
-        ch_2009_seroprevalence,
-        date_source=Variable(date="2017"),
-        location_source=Variable(country="Denmark"),
-    )
-    dk_2018 = dataclasses.replace(
-        ch_2009_seroprevalence,
-        date_source=Variable(date="2018"),
-        location_source=Variable(country="Denmark"),
-    )
-    # Not included due to being a Group 2 virus (i.e., a virus we picked once
-    # we saw it was high relative abundance in sequencing data. This post-hoc
-    # selection is hard to explain and doesn't add much to the results due to
-    # the connnected selection bias.)
     return []
 
 
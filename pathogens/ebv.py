@@ -28,9 +28,11 @@ us_fraction_u18 = Scalar(
     scalar=0.222,
     source="https://www.census.gov/quickfacts/fact/table/US/LFE046221#:~:text=%EE%A0%BF-,22.2%25,-Persons%2065%20years",
 )
-us_population_u18 = us_population(year=2022) * us_fraction_u18
+us_population_2022 = us_population(year=2022)
 
-us_population_18plus = us_population(year=2022) - us_population_u18
+us_population_u18 = us_population_2022 * us_fraction_u18
+
+us_population_18plus = us_population_2022 - us_population_u18
 
 
 uk_seroprevalence_0_to_25 = Prevalence(
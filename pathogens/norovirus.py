@@ -1,7 +1,11 @@
 import dataclasses
-from collections import Counter, defaultdict
+from functools import cache
 
 import numpy as np
+import pandas as pd
+import pyarrow as pa  # type: ignore
+import pyarrow.compute as pc  # type: ignore
+import pyarrow.csv as pacsv  # type: ignore
 
 from pathogen_properties import *
 
@@ -67,90 +71,97 @@ us_population_2006 = Population(
     source="https://www.ncbi.nlm.nih.gov/pmc/articles/PMC3375761/#:~:text=population%20in%202006%20(-,299%20million%20persons,-).%20Estimates%20were%20derived",
 )
 
-monthwise_count = dict[tuple[int, int], float]  # [year, month] -> float
+# When estimating the historical pattern, use 2012 through 2019.  This is:
+#  * Recent enough to have good data
+#  * Long enough to reduce noise
+#  * Pre-covid
+HISTORY_START = 2012
+COVID_START = 2020
+DATA_END = 2022
+
+YEARS = range(HISTORY_START, DATA_END)
+
+NORS_DASHBOARD = "https://wwwn.cdc.gov/norsdashboard/"
+
+# [year - HISTORY_START, month - 1] -> float
+monthwise_count = np.ndarray
+
+DAYS_IN_MONTH = np.array(
+    [[days_in_month(year, month) for month in range(1, 13)] for year in YEARS]
+)
 
 
 def to_daily_counts(outbreaks_per_month: monthwise_count) -> monthwise_count:
-    outbreaks_per_day: monthwise_count = {}
-    for year, month in outbreaks_per_month:
-        outbreaks_per_day[year, month] = outbreaks_per_month[
-            year, month
-        ] / days_in_month(year, month)
-    return outbreaks_per_day
+    return outbreaks_per_month / DAYS_IN_MONTH
 
 
+# Several callers (fitting, tests, summaries) ask for incidences in the same
+# process; parse the NORS file once.  The counts are read-only so that the
+# cached arrays can be shared safely.
+@cache
 def load_nors_outbreaks() -> (
     tuple[monthwise_count, monthwise_count, monthwise_count]
 ):
-    us_outbreaks: monthwise_count = defaultdict(float)  # date -> count
-    us_outbreaks_I: monthwise_count = defaultdict(float)  # date -> count
-    us_outbreaks_II: monthwise_count = defaultdict(float)  # date -> count
-
-    # seen_I, seen_II -> count
-    totals: dict[tuple[bool, bool], int] = Counter()
-    total_seen_other = 0
-
     # Downloaded on 2023-04-28 from https://wwwn.cdc.gov/norsdashboard/
     # Click "Download all NORS Dashboard data (Excel)."
     # Exported from Google Sheets as CSV.
     #
     # Data entries start in 1971 and run through the end of 2021.
     # We're only using data from HISTORY_START (2012) onward.
-    with open(prevalence_data_filename("cdc-nors-outbreak-data.tsv")) as inf:
-        cols = None
-        for line in inf:
-            row = line.strip().split("\t")
-            if not cols:
-                cols = row
-                continue
-
-            year = int(row[cols.index("Year")])
-            month = int(row[cols.index("Month")])
-            state = row[cols.index("State")]
-            etiologies = row[cols.index("Etiology")]
-            # It distinguishes between GI and GII Norovirus.  I'm currently
-            # discarding this, but it could potentially be useful?
-            genotype = row[cols.index("Serotype or Genotype")]
-            if "Norovirus" not in etiologies:
-                # It's the National Outbreak Reporting System, not the
-                # Norovirus Outbreak Reporting System.
-                #
-                # The non-Norovirus ones are almost all bacteria or parasites,
-                # though, not much useful to us.
-                continue
-
-            date = year, month
-
-            seen_I = False
-            seen_II = False
-            seen_other = False
-            for etiology in etiologies.split("; "):
-                if etiology.endswith("Norovirus Genogroup I"):
-                    seen_I = True
-                elif etiology.endswith("Norovirus Genogroup II"):
-                    seen_II = True
-                elif "Genogroup" in etiology:
-                    seen_other = True
-
-            us_outbreaks[date] += 1
-            if seen_I and not seen_II:
-                us_outbreaks_I[date] += 1
-            elif seen_II and not seen_I:
-                us_outbreaks_II[date] += 1
-
-            if seen_other:
-                total_seen_other += 1
-
-            # We don't care about the I-vs-II labeling in old data, so ignore
-            # dates before HISTORY_START.
-            if year >= HISTORY_START:
-                totals[seen_I, seen_II] += 1
-
-    total_classified = (
-        totals[True, False] + totals[False, True] + totals[True, True]
+    #
+    # The "Serotype or Genotype" column distinguishes between GI and GII
+    # Norovirus.  We're currently discarding this, but it could potentially
+    # be useful?
+    outbreaks = pacsv.read_csv(
+        prevalence_data_filename("cdc-nors-outbreak-data.tsv"),
+        parse_options=pacsv.ParseOptions(delimiter="\t", quote_char=False),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=["Year", "Month", "Etiology"],
+            column_types={
+                "Year": pa.int16(),
+                "Month": pa.int8(),
+                "Etiology": pa.string(),
+            },
+        ),
     )
-
-    seen_both_fraction = totals[True, True] / total_classified
+    # It's the National Outbreak Reporting System, not the Norovirus Outbreak
+    # Reporting System.  The non-Norovirus ones are almost all bacteria or
+    # parasites, though, not much useful to us.
+    outbreaks = outbreaks.filter(
+        pc.match_substring(outbreaks["Etiology"], "Norovirus")
+    ).to_pandas()
+
+    etiologies = outbreaks.Etiology.str.split("; ").explode()
+    seen_I = etiologies.str.endswith("Norovirus Genogroup I")
+    seen_II = etiologies.str.endswith("Norovirus Genogroup II")
+    seen_other = ~seen_I & ~seen_II & etiologies.str.contains("Genogroup")
+    seen_I = seen_I.groupby(level=0).any()
+    seen_II = seen_II.groupby(level=0).any()
+    seen_other = seen_other.groupby(level=0).any()
+
+    # Only YEARS are counted, zero-filling months with no outbreaks.  Number
+    # the months of YEARS consecutively so that counting is one bincount.
+    in_years = (outbreaks.Year >= HISTORY_START) & (outbreaks.Year < DATA_END)
+    month_number = (outbreaks.Year - HISTORY_START) * 12 + outbreaks.Month - 1
+
+    def count_by_month(selected: pd.Series) -> monthwise_count:
+        counts = np.bincount(
+            month_number[selected & in_years], minlength=len(YEARS) * 12
+        )
+        monthwise = counts.astype(float).reshape(len(YEARS), 12)
+        monthwise.flags.writeable = False
+        return monthwise
+
+    us_outbreaks = count_by_month(in_years)
+    us_outbreaks_I = count_by_month(seen_I & ~seen_II)
+    us_outbreaks_II = count_by_month(seen_II & ~seen_I)
+
+    # We don't care about the I-vs-II labeling in old data, so ignore dates
+    # before HISTORY_START.
+    recent = outbreaks.Year >= HISTORY_START
+    total_classified = (recent & (seen_I | seen_II)).sum()
+
+    seen_both_fraction = (recent & seen_I & seen_II).sum() / total_classified
 
     # As of 2023-05-03 this was 1.05%, low enough to ignore.  If this were
     # higher we'd need to estimate prevalences that didn't add to the total
@@ -159,28 +170,14 @@ def load_nors_outbreaks() -> (
 
     # As of 2023-05-03 this was 0.15%, low enough to ignore.  If this were
     # non-trivial we might want to try assigning reads to other genogroups.
-    assert total_seen_other / total_classified < 0.0015
+    assert seen_other.sum() / total_classified < 0.0015
 
     return us_outbreaks, us_outbreaks_I, us_outbreaks_II
 
 
 def determine_average_daily_outbreaks(us_outbreaks: monthwise_count) -> float:
-    total_us_outbreaks = 0.0
-    days_considered = 0
-    for year in range(HISTORY_START, COVID_START):
-        for month in range(1, 13):
-            total_us_outbreaks += us_outbreaks[year, month]
-            days_considered += days_in_month(year, month)
-    return total_us_outbreaks / days_considered
-
-
-# When estimating the historical pattern, use 2012 through 2019.  This is:
-#  * Recent enough to have good data
-#  * Long enough to reduce noise
-#  * Pre-covid
-HISTORY_START = 2012
-COVID_START = 2020
-DATA_END = 2022
+    history = slice(0, COVID_START - HISTORY_START)
+    return us_outbreaks[history].sum() / DAYS_IN_MONTH[history].sum()
 
 
 def estimate_incidences() -> list[IncidenceRate]:
@@ -196,56 +193,60 @@ def estimate_incidences() -> list[IncidenceRate]:
         * us_total_relative_to_foodborne_2006
     )
 
-    us_daily_outbreaks = to_daily_counts(us_outbreaks)
-
-    for year in range(HISTORY_START, DATA_END):
-        us_total_I = 0.0
-        us_total_II = 0.0
-        for month in range(1, 13):
-            us_total_I += us_outbreaks_I[year, month]
-            us_total_II += us_outbreaks_II[year, month]
-        assert us_total_I
-        assert us_total_II
+    adjustments = (
+        to_daily_counts(us_outbreaks) / pre_covid_us_average_daily_outbreaks
+    )
 
+    # Assume that all Norovirus infections are either Group I or II, which is
+    # very close (see assertion in load_nors_outbreaks).  Also assume the
+    # outbreaks for which we have subtype info are representative of all
+    # infections.
+    us_total_I = us_outbreaks_I.sum(axis=1, keepdims=True)
+    us_total_II = us_outbreaks_II.sum(axis=1, keepdims=True)
+    assert us_total_I.all()
+    assert us_total_II.all()
+    monthly_total = us_outbreaks_I + us_outbreaks_II
+    annual_total = us_total_I + us_total_II
+    # Without both I and II records in a month there aren't enough to compute
+    # a ratio between them.  Fall back to the annual ratio.
+    has_both = (us_outbreaks_I > 0) & (us_outbreaks_II > 0)
+
+    def group_fractions(
+        monthly: monthwise_count, annual: np.ndarray
+    ) -> monthwise_count:
+        return np.divide(
+            monthly,
+            monthly_total,
+            out=np.broadcast_to(annual / annual_total, monthly.shape).copy(),
+            where=has_both,
+        )
+
+    group_I_fractions = group_fractions(us_outbreaks_I, us_total_I)
+    group_II_fractions = group_fractions(us_outbreaks_II, us_total_II)
+
+    for i, year in enumerate(YEARS):
         for month in range(1, 13):
             adjustment = Scalar(
-                scalar=us_daily_outbreaks[year, month]
-                / pre_covid_us_average_daily_outbreaks,
+                scalar=adjustments[i, month - 1],
                 country="United States",
                 date=f"{year}-{month:02d}",
-                source="https://wwwn.cdc.gov/norsdashboard/",
+                source=NORS_DASHBOARD,
             )
             adjusted_national_incidence = dataclasses.replace(
                 pre_covid_national_incidence * adjustment,
                 date_source=adjustment,
             )
-
-            # Assume that all Norovirus infections are either Group I or II,
-            # which is very close (see assertion above).  Also assume the
-            # outbreaks for which we have subtype info are representative of
-            # all infections.
-            us_I = us_outbreaks_I[year, month]
-            us_II = us_outbreaks_II[year, month]
-            if us_I and us_II:
-                group_I_fraction = us_I / (us_I + us_II)
-                group_II_fraction = us_II / (us_I + us_II)
-            else:
-                # Not enough records for this month to compute a ratio between
-                # I and II.  Fall back to the annual ratio.
-                group_I_fraction = us_total_I / (us_total_I + us_total_II)
-                group_II_fraction = us_total_II / (us_total_I + us_total_II)
-
             incidences.append(
                 dataclasses.replace(
                     adjusted_national_incidence
-                    * Scalar(scalar=group_I_fraction),
+                    * Scalar(scalar=group_I_fractions[i, month - 1]),
                     taxid=NOROVIRUS_GROUP_I,
                 )
             )
             incidences.append(
                 dataclasses.replace(
                     adjusted_national_incidence
-                    * Scalar(scalar=group_II_fraction),
+                    * Scalar(scalar=group_II_fractions[i, month - 1]),
                     taxid=NOROVIRUS_GROUP_II,
                 )
             )
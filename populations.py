@@ -1,3 +1,4 @@
+from functools import cache
 from typing import Optional
 
 from pathogen_properties import Population, prevalence_data_filename
@@ -26,6 +27,9 @@ def load_location_populations():
             location_populations.append((location, counts))
 
 
+# Population is frozen, so callers can share the cached result for a
+# given (year, county, state) instead of rescanning every county again.
+@cache
 def us_population(
     year: int, county: Optional[str] = None, state: Optional[str] = None
 ) -> Population:
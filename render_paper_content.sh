@@ -34,12 +34,11 @@ cd "$BASE_DIR/figures"
 # Array of figure scripts
 FIGURE_SCRIPTS=(
     "fig_1.py"
-    "fig_2.py"
+    "build_all.py"  # fig_2 and fig_s3
     "fig_3.py"
     "fig_4.py"
     "fig_s1.py"
     "fig_s2.py"
-    "fig_s3.py"
     "fig_s4.py"
 )
 
@@ -189,11 +189,18 @@ class Model(Generic[P]):
             stan_code, data=stan_data, random_seed=self.random_seed
         )
 
-    def fit_model(self, num_chains: int = 4, num_samples: int = 1000) -> None:
+    def fit_model(
+        self,
+        num_chains: int = 4,
+        num_samples: int = 1000,
+        num_warmup: int = 1000,
+    ) -> None:
         self.num_samples = num_samples
         self.num_chains = num_chains
         self.fit = self.model.sample(
-            num_chains=self.num_chains, num_samples=self.num_samples
+            num_chains=self.num_chains,
+            num_samples=self.num_samples,
+            num_warmup=num_warmup,
         )
         self.output_df = self.fit.to_frame()
 
@@ -396,14 +403,13 @@ def choose_predictor(predictors: list[Predictor]) -> Predictor | None:
         raise NotImplementedError("More than one matching predictor")
 
 
-def build_model(
+def build_data(
     mgs_data: MGSData,
     bioprojects: list[BioProject],
     predictors: list[Predictor],
     taxids: frozenset[TaxID],
-    random_seed: int,
     enrichment: Optional[Enrichment],
-) -> Model | None:
+) -> list[DataPoint] | None:
     sample_attributes = {}  # sample -> attributes
     study_viral_reads = {}  # sample -> viral_reads
     for bioproject in bioprojects:
@@ -423,6 +429,21 @@ def build_model(
     # No predictors found
     if all(point.predictor is None for point in data):
         return None
+    else:
+        return data
+
+
+def build_model(
+    mgs_data: MGSData,
+    bioprojects: list[BioProject],
+    predictors: list[Predictor],
+    taxids: frozenset[TaxID],
+    random_seed: int,
+    enrichment: Optional[Enrichment],
+) -> Model | None:
+    data = build_data(mgs_data, bioprojects, predictors, taxids, enrichment)
+    if data is None:
+        return None
     else:
         return Model(data=data, random_seed=random_seed)
 
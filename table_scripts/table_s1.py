@@ -2,15 +2,14 @@ import gzip
 import json
 import os
 import subprocess
-import csv
 import pandas as pd
-from scipy.stats import gmean
 import numpy as np
 
 if os.path.basename(os.getcwd()) != "table_scripts":
     raise RuntimeError("Run this script from table_scripts/")
 
 from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 BIOPROJECT_DIR = "bioprojects"
 TABLE_DIR = "tables"
@@ -19,6 +18,8 @@ if not os.path.exists(os.path.join("..", TABLE_DIR)):
 
 DEBUG = None
 
+SUPERSCRIPT_MAP = str.maketrans("0123456789-", "⁰¹²³⁴⁵⁶⁷⁸⁹⁻")
+
 
 TARGET_STUDY_METADATA = {
     "Brinch 2020": ["PRJEB13832", "PRJEB34633"],
@@ -36,45 +37,70 @@ sample_files = [
 ]
 
 
+def download(study_author: str, bioproject: str, fname: str) -> None:
+    if fname == "sample-metadata":
+        subprocess.run(
+            [
+                "aws",
+                "s3",
+                "cp",
+                f"s3://nao-mgs-wb/{study_author}-{bioproject}/output/{fname}.csv",
+                f"../{BIOPROJECT_DIR}/{study_author}-{bioproject}/{fname}.csv",
+            ],
+            check=True,
+        )
+    else:
+        subprocess.run(
+            [
+                "aws",
+                "s3",
+                "cp",
+                f"s3://nao-mgs-wb/{study_author}-{bioproject}/output/{fname}.tsv.gz",
+                f"../{BIOPROJECT_DIR}/{study_author}-{bioproject}/{fname}.tsv.gz",
+            ],
+            check=True,
+        )
+
+
 def get_data():
+    missing = []
     for study, bioprojects in TARGET_STUDY_METADATA.items():
+        study_author = study.split()[0]
         for bioproject in bioprojects:
+            # List each directory once instead of checking every file.
+            try:
+                with os.scandir(
+                    f"../{BIOPROJECT_DIR}/{study_author}-{bioproject}"
+                ) as entries:
+                    present = {entry.name for entry in entries}
+            except FileNotFoundError:
+                present = set()
             for fname in sample_files:
-                study_author = study.split()[0]
                 if fname == "sample-metadata":
-                    if not os.path.exists(
-                        f"../{BIOPROJECT_DIR}/{study_author}-{bioproject}/{fname}.csv"
-                    ):
-                        subprocess.run(
-                            [
-                                "aws",
-                                "s3",
-                                "cp",
-                                f"s3://nao-mgs-wb/{study_author}-{bioproject}/output/{fname}.csv",
-                                f"../{BIOPROJECT_DIR}/{study_author}-{bioproject}/{fname}.csv",
-                            ]
-                        )
+                    names = [f"{fname}.csv"]
                 else:
+                    # Downloads stay compressed, but fig_1 and the scripts
+                    # decompress theirs in place, so either form will do.
+                    names = [f"{fname}.tsv", f"{fname}.tsv.gz"]
+                if not present.intersection(names):
+                    missing.append((study_author, bioproject, fname))
+
+    # Each download is its own aws invocation that mostly waits on the
+    # network, so run them concurrently rather than one after another.
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda args: download(*args), missing))
+
+
+def tsv_path(study_bioproject: str, fname: str) -> str:
+    # The decompressed TSV if there is one, else the gzipped download.
+    path = f"../{BIOPROJECT_DIR}/{study_bioproject}/{fname}.tsv"
+    return path if os.path.exists(path) else f"{path}.gz"
+
 
-                    if not os.path.exists(
-                        f"../{BIOPROJECT_DIR}/{study_author}-{bioproject}/{fname}.tsv"
-                    ):
-                        subprocess.run(
-                            [
-                                "aws",
-                                "s3",
-                                "cp",
-                                f"s3://nao-mgs-wb/{study_author}-{bioproject}/output/{fname}.tsv.gz",
-                                f"../{BIOPROJECT_DIR}/{study_author}-{bioproject}/{fname}.tsv.gz",
-                            ]
-                        )
-                        subprocess.run(
-                            [
-                                "gzip",
-                                "-d",
-                                f"../{BIOPROJECT_DIR}/{study_author}-{bioproject}/{fname}.tsv.gz",
-                            ]
-                        )
+def read_tsv(path: str) -> pd.DataFrame:
+    # Parsing the TSVs dominates each run; the pyarrow engine does it in
+    # parallel, in C++.
+    return pd.read_csv(path, sep="\t", compression="infer", engine="pyarrow")
 
 
 def format_rel_abun(rel_abun):
@@ -87,13 +113,25 @@ def format_rel_abun(rel_abun):
             target_read_per_n = int(1 / rel_abun)
         except:
             target_read_per_n = "N/A"
-        superscript_map = str.maketrans("0123456789-", "⁰¹²³⁴⁵⁶⁷⁸⁹⁻")
-        exponent_unicode = str(int(exponent)).translate(superscript_map)
+        exponent_unicode = str(int(exponent)).translate(SUPERSCRIPT_MAP)
         return "{} × 10{} (1 in {})".format(
             rounded_base, exponent_unicode, target_read_per_n
         )
 
 
+def counts_by_sample(
+    df: pd.DataFrame, column: str, samples: list[str]
+) -> np.ndarray:
+    # Samples with no row for a count have zero such reads; the first row wins
+    # if there are several.
+    return (
+        df.drop_duplicates("sample")
+        .set_index("sample")[column]
+        .reindex(samples, fill_value=0)
+        .to_numpy()
+    )
+
+
 def assemble_table():
     get_data()
     virus_hv_rel_abun = namedtuple(
@@ -110,76 +148,70 @@ def assemble_table():
         for bioproject in bioprojects:
             study_bioproject = f"{study_author}-{bioproject}"
 
-            metadata_samples = {}
-            with open(
+            # Only the sample names and their enrichment are used; not every
+            # bioproject's metadata has an enrichment column.
+            metadata = pd.read_csv(
                 f"../{BIOPROJECT_DIR}/{study_bioproject}/sample-metadata.csv",
-                mode="r",
+                usecols=lambda column: column in ["sample", "enrichment"],
+                dtype=str,
+                keep_default_na=False,
                 encoding="utf-8-sig",
-            ) as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    sample = row.pop("sample")
-                    metadata_samples[sample] = row
-
-            hv_clade_counts = pd.read_csv(
-                f"../{BIOPROJECT_DIR}/{study_bioproject}/hv_clade_counts.tsv",
-                sep="\t",
+            ).reindex(columns=["sample", "enrichment"])
+            enrichments = dict(zip(metadata["sample"], metadata["enrichment"]))
+            samples = list(enrichments.keys())
+            if not samples:
+                continue
+
+            hv_clade_counts = read_tsv(
+                tsv_path(study_bioproject, "hv_clade_counts")
             )
 
-            taxonomic_composition = pd.read_csv(
-                f"../{BIOPROJECT_DIR}/{study_bioproject}/taxonomic_composition.tsv",
-                sep="\t",
+            taxonomic_composition = read_tsv(
+                tsv_path(study_bioproject, "taxonomic_composition")
             )
-            qc_basic_stats = pd.read_csv(
-                f"../{BIOPROJECT_DIR}/{study_bioproject}/qc_basic_stats.tsv",
-                sep="\t",
+            qc_basic_stats = read_tsv(
+                tsv_path(study_bioproject, "qc_basic_stats")
             ).set_index(["sample", "stage"])
 
-            samples = metadata_samples.keys()
             modified_study = study
 
-            for sample in samples:
+            total_hv_reads = counts_by_sample(
+                hv_clade_counts[hv_clade_counts["taxid"] == 10239],
+                "n_reads_clade",
+                samples,
+            )
+            total_viral_reads = counts_by_sample(
+                taxonomic_composition[
+                    taxonomic_composition["classification"] == "Viral"
+                ],
+                "n_reads",
+                samples,
+            )
+            total_reads = (
+                qc_basic_stats.xs("raw_concat", level="stage")
+                .loc[samples, "n_read_pairs"]
+                .to_numpy()
+            )
+            hv_rel_abuns = total_hv_reads / total_reads
+            virus_rel_abuns = total_viral_reads / total_reads
+
+            for sample, hv_rel_abun, virus_rel_abun in zip(
+                samples, hv_rel_abuns, virus_rel_abuns
+            ):
                 if study == "CC 2021":
-                    # print(metadata_samples[sample]["enrichment"])
-                    if metadata_samples[sample]["enrichment"] == "enriched":
+                    # print(enrichments[sample])
+                    if enrichments[sample] == "enriched":
                         modified_study = "Crits-Christoph 2023 Panel-enriched"
-                    elif (
-                        metadata_samples[sample]["enrichment"] == "unenriched"
-                    ):
+                    elif enrichments[sample] == "unenriched":
                         modified_study = "Crits-Christoph 2023 Unenriched"
 
                 if study == "Rothman 2021":
-                    # print(metadata_samples[sample]["enrichment"])
-                    if metadata_samples[sample]["enrichment"] == "0":
+                    # print(enrichments[sample])
+                    if enrichments[sample] == "0":
                         modified_study = "Rothman 2021 Unenriched"
-                    elif metadata_samples[sample]["enrichment"] == "1":
+                    elif enrichments[sample] == "1":
                         modified_study = "Rothman 2021 Panel-enriched"
 
-                try:
-                    total_hv_reads = hv_clade_counts.loc[
-                        (hv_clade_counts["taxid"] == 10239)
-                        & (hv_clade_counts["sample"] == sample),
-                        "n_reads_clade",
-                    ].values[0]
-                except IndexError:
-                    total_hv_reads = 0
-
-                try:
-                    total_viral_reads = taxonomic_composition.loc[
-                        (taxonomic_composition["sample"] == sample)
-                        & (taxonomic_composition["classification"] == "Viral"),
-                        "n_reads",
-                    ].values[0]
-                except IndexError:
-                    total_viral_reads = 0
-
-                total_reads = qc_basic_stats.at[
-                    (sample, "raw_concat"), "n_read_pairs"
-                ]
-
-                hv_rel_abun = total_hv_reads / total_reads
-                virus_rel_abun = total_viral_reads / total_reads
-
                 study_relative_abundance[modified_study][sample] = (
                     virus_hv_rel_abun(hv_rel_abun, virus_rel_abun)
                 )
@@ -22,6 +22,15 @@ MISEQ_DEPTH = 2e6
 NEXTSEQ_COST = 1397
 NEXTSEQ_DEPTH = 45e6
 
+# On a tie, argmin picks the first of these.
+SEQUENCERS = ["NovaSeq (lane)", "MiSeq", "NextSeq", "NovaSeq (cell)"]
+SEQUENCER_COSTS = np.array(
+    [NOVASEQ_LANE_COST, MISEQ_COST, NEXTSEQ_COST, NOVASEQ_CELL_COST]
+)
+SEQUENCER_DEPTHS = np.array(
+    [NOVASEQ_LANE_DEPTH, MISEQ_DEPTH, NEXTSEQ_DEPTH, NOVASEQ_CELL_DEPTH]
+)
+
 # https://www.illumina.com/products/by-type/sequencing-kits/library-prep-kits/respiratory-virus-oligo-panel.html#tabs-0f175ae031-item-7349ca530e-order
 # $10,368 for 32 reactions.
 ENRICHMENT_COST = 324
@@ -115,30 +124,9 @@ def get_sequencing_cost(virus, cumulative_incidence, study, enriched):
         enriched,
     )
 
-    novaseq_lane_cost = NOVASEQ_LANE_COST * np.ceil(
-        seq_depth / NOVASEQ_LANE_DEPTH
-    )
-    miseq_cost = MISEQ_COST * np.ceil(seq_depth / MISEQ_DEPTH)
-    nextseq_cost = NEXTSEQ_COST * np.ceil(seq_depth / NEXTSEQ_DEPTH)
-    novaseq_cell_cost = NOVASEQ_CELL_COST * np.ceil(
-        seq_depth / NOVASEQ_CELL_DEPTH
-    )
-    lowest_cost = min(
-        novaseq_lane_cost, miseq_cost, nextseq_cost, novaseq_cell_cost
-    )
-
-    sequencer = (
-        "NovaSeq (lane)"
-        if lowest_cost == novaseq_lane_cost
-        else (
-            "MiSeq"
-            if lowest_cost == miseq_cost
-            else "NextSeq" if lowest_cost == nextseq_cost else "NovaSeq (cell)"
-        )
-    )
-
-    seq_cost = lowest_cost
-    return seq_cost, sequencer, seq_depth
+    costs = SEQUENCER_COSTS * np.ceil(seq_depth / SEQUENCER_DEPTHS)
+    cheapest = costs.argmin()
+    return costs[cheapest], SEQUENCERS[cheapest], seq_depth
 
 
 def round_to_three_digits(num):
@@ -1,16 +1,19 @@
 import csv
+from collections import defaultdict
 from dataclasses import dataclass
+from functools import cache
 
-import matplotlib.pyplot as plt  # type: ignore
 import numpy as np
 import os
-from scipy.stats import gmean
+import pandas as pd
 
 PERCENTILES = [5, 25, 50, 75, 95]
 
 MODEL_OUTPUT_DIR = "../model_output"
 TABLE_OUTPUT_DIR = "../tables"
 
+SUPERSCRIPT_MAP = str.maketrans("0123456789", "⁰¹²³⁴⁵⁶⁷⁸⁹")
+
 
 @dataclass
 class SummaryStats:
@@ -21,53 +24,70 @@ class SummaryStats:
     max: float
 
 
-def tidy_number(reads_required=int) -> str:
-    sci_notation = f"{reads_required:.2e}"
-
-    coefficient, exponent = sci_notation.split("e")
-
-    is_negative = exponent.startswith("-")
-    if is_negative:
-        exponent = exponent[1:]
-
-    exponent = exponent.lstrip("0")
-
-    if is_negative:
-        exponent = "⁻" + exponent
-
-    superscript_map = str.maketrans("0123456789", "⁰¹²³⁴⁵⁶⁷⁸⁹")
-    exponent = exponent.translate(superscript_map)
-
-    return f"{coefficient} × 10{exponent}"
-
-
-def read_data() -> dict[tuple[str, str, str, str], SummaryStats]:
-    data = {}
-    with open(os.path.join(MODEL_OUTPUT_DIR, "fits_summary.tsv")) as datafile:
-        reader = csv.DictReader(datafile, delimiter="\t")
-        for row in reader:
-            virus = row["tidy_name"]
-            predictor_type = row["predictor_type"]
-            study = row["study"]
-            location = row["location"]
-            data[virus, predictor_type, study, location] = SummaryStats(
-                mean=tidy_number(float(row["mean"])),
-                std=tidy_number(float(row["std"])),
-                min=tidy_number(float(row["min"])),
-                percentiles={p: float(row[f"{p}%"]) for p in PERCENTILES},
-                max=tidy_number(float(row["max"])),
-            )
-    return data
+def tidy_numbers(reads_required: np.ndarray) -> np.ndarray:
+    # Formats a whole array at once.  "%.2e" rounds exactly like f"{x:.2e}".
+    sci_notation = np.char.mod("%.2e", reads_required)
+
+    parts = np.char.partition(sci_notation, "e")
+    coefficient, exponent = parts[..., 0], parts[..., 2]
+
+    is_negative = np.char.startswith(exponent, "-")
+    exponent = np.char.lstrip(np.char.lstrip(exponent, "-"), "0")
+    exponent = np.where(is_negative, np.char.add("⁻", exponent), exponent)
+
+    exponent = np.char.translate(exponent, SUPERSCRIPT_MAP)
+
+    return np.char.add(np.char.add(coefficient, " × 10"), exponent)
+
+
+# (virus, predictor type) -> (study, location) -> stats
+ByVirus = dict[tuple[str, str], dict[tuple[str, str], SummaryStats]]
+
+
+# Parsed once per process; callers only read the result.
+@cache
+def read_data() -> ByVirus:
+    columns = [
+        "tidy_name",
+        "predictor_type",
+        "study",
+        "location",
+        "mean",
+        "std",
+        "min",
+        "max",
+    ] + [f"{p}%" for p in PERCENTILES]
+    summary = pd.read_csv(
+        os.path.join(MODEL_OUTPUT_DIR, "fits_summary.tsv"),
+        sep="\t",
+        engine="pyarrow",
+        usecols=columns,
+    )[columns]
+    by_virus: ByVirus = defaultdict(dict)
+    for (
+        virus,
+        predictor_type,
+        study,
+        location,
+        mean,
+        std,
+        min_ra,
+        max_ra,
+        *percentiles,
+    ) in summary.itertuples(index=False, name=None):
+        by_virus[virus, predictor_type][study, location] = SummaryStats(
+            mean=mean,
+            std=std,
+            min=min_ra,
+            percentiles=dict(zip(PERCENTILES, percentiles)),
+            max=max_ra,
+        )
+    return dict(by_virus)
 
 
 def create_tsv():
-    data = read_data()
-    viruses = set()
-    for entry in data.keys():
-        virus, predictor_type = entry[:2]
-        viruses.add((virus, predictor_type))
-
-    sorted_viruses = sorted(viruses, key=lambda x: (x[1], x[0]))
+    by_virus = read_data()
+    sorted_viruses = sorted(by_virus.items(), key=lambda x: (x[0][1], x[0][0]))
     study_tidy = {
         "rothman": "Rothman",
         "crits_christoph": "Crits-Christoph",
@@ -82,45 +102,48 @@ def create_tsv():
         "w",
         newline="",
     ) as file:
-        writer = csv.DictWriter(file, fieldnames=headers, delimiter="\t")
-        writer.writeheader()
+        writer = csv.writer(file, delimiter="\t")
+        writer.writerow(headers)
 
-        for virus, predictor_type in sorted_viruses:
+        # (virus, study, median, 5th, 95th); the numbers are formatted
+        # together once every row is known.
+        rows = []
+        for (virus, predictor_type), stats_by_study in sorted_viruses:
             studies = ["rothman", "crits_christoph", "spurbeck"] + (
                 ["brinch"] if predictor_type == "prevalence" else []
             )
-            gmean_data = {
-                "Median": [],
-                "5th Percentile": [],
-                "95th Percentile": [],
-            }
-
-            for study in studies:
-                stats = data[virus, predictor_type, study, "Overall"]
-                writer.writerow(
-                    {
-                        "Virus": virus,
-                        "Study": study_tidy[study],
-                        "Median": tidy_number(stats.percentiles[50]),
-                        "5th Percentile": tidy_number(stats.percentiles[5]),
-                        "95th Percentile": tidy_number(stats.percentiles[95]),
-                    }
+            # Median, 5th and 95th percentile for each study.
+            percentiles = np.array(
+                [
+                    [
+                        stats_by_study[study, "Overall"].percentiles[p]
+                        for p in [50, 5, 95]
+                    ]
+                    for study in studies
+                ]
+            )
+            for study, (median, lower, upper) in zip(studies, percentiles):
+                rows.append((virus, study_tidy[study], median, lower, upper))
+
+            gmean_median, gmean_lower, gmean_upper = np.exp(
+                np.log(percentiles).mean(axis=0)
+            )
+            rows.append(
+                (
+                    virus,
+                    "Mean (geometric)",
+                    gmean_median,
+                    gmean_lower,
+                    gmean_upper,
                 )
-                gmean_data["Median"].append(stats.percentiles[50])
-                gmean_data["5th Percentile"].append(stats.percentiles[5])
-                gmean_data["95th Percentile"].append(stats.percentiles[95])
-
-            gmean_median = gmean(gmean_data["Median"])
-            gmean_lower = gmean(gmean_data["5th Percentile"])
-            gmean_upper = gmean(gmean_data["95th Percentile"])
-            writer.writerow(
-                {
-                    "Virus": virus,
-                    "Study": "Mean (geometric)",
-                    "Median": tidy_number(gmean_median),
-                    "5th Percentile": tidy_number(gmean_lower),
-                    "95th Percentile": tidy_number(gmean_upper),
-                }
+            )
+
+        # With no fits there's nothing to unzip; leave just the header.
+        if rows:
+            viruses, study_names, *numbers = zip(*rows)
+            medians, lowers, uppers = tidy_numbers(np.array(numbers))
+            writer.writerows(
+                zip(viruses, study_names, medians, lowers, uppers)
             )
 
 
@@ -1,240 +1,264 @@
-#!/usr/bin/env python3
-
 import datetime
-import unittest
 from collections import Counter
 
+import numpy as np
+import pytest
+
 import mgs
 import pathogens
 import populations
 import stats
 from pathogen_properties import *
 
+PATHOGEN_IDS = list(pathogens.pathogens.keys())
+
+# It's expected that these pathogens have no estimates; see
+# https://docs.google.com/document/d/1IIeOFKNqAwf9NTJeVFRSl_Q9asvu9_TGc_HSrlXg8PI/edit
+NO_ESTIMATE_PATHOGENS = frozenset({"aav5", "aav6", "hbv", "hsv_2"})
+
+
+# Every pathogen x study combination, so that each one is a separate test
+# item.  Only the names go into the parametrization; the tests look up each
+# pathogen's predictors in the predictors_by_pathogen fixture.
+MODEL_CASES = [
+    pytest.param(pathogen_name, study, id=f"{pathogen_name}-{study}")
+    for pathogen_name in PATHOGEN_IDS
+    for study in mgs.target_bioprojects
+]
+
+# The same, split out by bioproject.
+BIOPROJECT_CASES = [
+    pytest.param(
+        pathogen_name,
+        study,
+        bioproject,
+        id=f"{pathogen_name}-{study}-{bioproject}",
+    )
+    for pathogen_name in PATHOGEN_IDS
+    for study, bioprojects in mgs.target_bioprojects.items()
+    for bioproject in bioprojects
+]
+
+
+@pytest.fixture(scope="module")
+def hiv_prevalences(all_estimates):
+    prevalences, _ = all_estimates["hiv"]
+    return dict(
+        zip(
+            [
+                "us_2019",
+                "us_2020",
+                "us_2021",
+                "copenhagen_2022",
+                "copenhagen_2018",
+                "copenhagen_2017",
+                "copenhagen_2016",
+                "copenhagen_2015",
+            ],
+            prevalences,
+            strict=True,
+        )
+    )
+
 
-class TestPathogens(unittest.TestCase):
+class TestPathogens:
     def test_hsv1_imported(self):
-        self.assertIn("hsv_1", pathogens.pathogens)
-
-    def test_summarize_location(self):
-        (
-            us_2019,
-            us_2020,
-            us_2021,
-            copenhagen_2022,
-            copenhagen_2018,
-            copenhagen_2017,
-            copenhagen_2016,
-            copenhagen_2015,
-        ) = pathogens.pathogens["hiv"].estimate_prevalences()
-        self.assertEqual(us_2019.summarize_location(), "United States")
-
-    def test_dates(self):
-        (
-            us_2019,
-            us_2020,
-            us_2021,
-            copenhagen_2022,
-            copenhagen_2018,
-            copenhagen_2017,
-            copenhagen_2016,
-            copenhagen_2015,
-        ) = pathogens.pathogens["hiv"].estimate_prevalences()
-        self.assertEqual(us_2019.parsed_start, datetime.date(2019, 1, 1))
-        self.assertEqual(us_2019.parsed_end, datetime.date(2019, 12, 31))
-
-    def test_properties_exist(self):
-        for pathogen_name, pathogen in pathogens.pathogens.items():
-            with self.subTest(pathogen=pathogen_name):
-                self.assertIsInstance(pathogen.background, str)
-
-                self.assertIsInstance(pathogen.pathogen_chars, PathogenChars)
-
-                saw_estimate = False
-                for estimate in pathogen.estimate_prevalences():
-                    self.assertIsInstance(estimate, Prevalence)
-                    saw_estimate = True
-                for estimate in pathogen.estimate_incidences():
-                    self.assertIsInstance(estimate, IncidenceRate)
-                    saw_estimate = True
-                if pathogen_name in ["aav5", "aav6", "hbv", "hsv_2"]:
-                    # It's expected that these pathogens have no estimates; see
-                    # https://docs.google.com/document/d/1IIeOFKNqAwf9NTJeVFRSl_Q9asvu9_TGc_HSrlXg8PI/edit
-                    self.assertFalse(saw_estimate)
+        assert "hsv_1" in pathogens.pathogens
+
+    def test_summarize_location(self, hiv_prevalences):
+        us_2019 = hiv_prevalences["us_2019"]
+        assert us_2019.summarize_location() == "United States"
+
+    def test_dates(self, hiv_prevalences):
+        us_2019 = hiv_prevalences["us_2019"]
+        assert us_2019.parsed_start == datetime.date(2019, 1, 1)
+        assert us_2019.parsed_end == datetime.date(2019, 12, 31)
+
+    @pytest.mark.parametrize("pathogen_name", PATHOGEN_IDS)
+    def test_properties_exist(self, pathogen_name, all_estimates):
+        pathogen = pathogens.pathogens[pathogen_name]
+        assert isinstance(pathogen.background, str)
+
+        assert isinstance(pathogen.pathogen_chars, PathogenChars)
+
+        prevalences, incidences = all_estimates[pathogen_name]
+        saw_estimate = False
+        for estimate in prevalences:
+            assert isinstance(estimate, Prevalence)
+            saw_estimate = True
+        for estimate in incidences:
+            assert isinstance(estimate, IncidenceRate)
+            saw_estimate = True
+        if pathogen_name in NO_ESTIMATE_PATHOGENS:
+            assert not saw_estimate
+        else:
+            assert saw_estimate
+
+    @pytest.mark.parametrize("pathogen_name", PATHOGEN_IDS)
+    def test_dates_set(self, pathogen_name, all_estimates):
+        prevalences, _ = all_estimates[pathogen_name]
+        for estimate in prevalences:
+            estimate.get_dates()
+
+    @pytest.mark.parametrize("pathogen_name", PATHOGEN_IDS)
+    def test_by_taxids(self, pathogen_name, by_taxids_map):
+        pathogen = pathogens.pathogens[pathogen_name]
+        for taxids, estimates in by_taxids_map[
+            pathogen_name, "prevalence"
+        ].items():
+            assert len(taxids) != 0
+            assert len(estimates) != 0
+            for estimate in estimates:
+                if estimate.taxid:
+                    assert taxids == frozenset([estimate.taxid])
                 else:
-                    self.assertTrue(saw_estimate)
-
-    def test_dates_set(self):
-        for pathogen_name, pathogen in pathogens.pathogens.items():
-            with self.subTest(pathogen=pathogen_name):
-                for estimate in pathogen.estimate_prevalences():
-                    estimate.get_dates()
-
-    def test_by_taxids(self):
-        for pathogen_name, pathogen in pathogens.pathogens.items():
-            with self.subTest(pathogen=pathogen_name):
-                for taxids, estimates in by_taxids(
-                    pathogen.pathogen_chars, pathogen.estimate_prevalences()
-                ).items():
-                    self.assertNotEqual(len(taxids), 0)
-                    self.assertNotEqual(len(estimates), 0)
-                    for estimate in estimates:
-                        if estimate.taxid:
-                            self.assertEqual(
-                                frozenset([estimate.taxid]), taxids
-                            )
-                        else:
-                            self.assertEqual(
-                                pathogen.pathogen_chars.taxids, taxids
-                            )
-
-    def test_duplicate_estimates(self):
-        for pathogen_name, pathogen in pathogens.pathogens.items():
-            with self.subTest(pathogen=pathogen_name):
-                for label, predictors in [
-                    (
-                        "prevalence",
-                        pathogen.estimate_prevalences(),
-                    ),
-                    (
-                        "incidence",
-                        pathogen.estimate_incidences(),
-                    ),
-                ]:
-                    for taxids, estimates in by_taxids(
-                        pathogen.pathogen_chars, predictors
-                    ).items():
-                        seen = set()
-                        for estimate in estimates:
-                            key = (
-                                estimate.get_dates(),
-                                estimate.summarize_location(),
-                            )
-                            if key in seen:
-                                self.fail(
-                                    f"Duplicate {label} estimate found for {pathogen_name}: {key}."
-                                )
-                            seen.add(key)
-
-
-class TestMMWRWeek(unittest.TestCase):
-    def test_mmwr_week(self):
-        self.assertEqual(
-            pathogens.pathogens["influenza"].parse_mmwr_week(2020, 1),
+                    assert taxids == pathogen.pathogen_chars.taxids
+
+    @pytest.mark.parametrize("pathogen_name", PATHOGEN_IDS)
+    def test_duplicate_estimates(self, pathogen_name, by_taxids_map):
+        for label in ["prevalence", "incidence"]:
+            for taxids, estimates in by_taxids_map[
+                pathogen_name, label
+            ].items():
+                keys = [
+                    (estimate.get_dates(), estimate.summarize_location())
+                    for estimate in estimates
+                ]
+                dupes = [
+                    key for key, count in Counter(keys).items() if count > 1
+                ]
+                assert (
+                    not dupes
+                ), f"Duplicate {label} estimates found for {pathogen_name}: {dupes}."
+
+
+class TestMMWRWeek:
+    @pytest.mark.parametrize(
+        "year,week,expected",
+        [
             # Year starts on a Wednesday, so week 1 starts in 2019.
-            datetime.date(2019, 12, 29),
-        )
-        self.assertEqual(
-            pathogens.pathogens["influenza"].parse_mmwr_week(2019, 1),
+            (2020, 1, datetime.date(2019, 12, 29)),
             # Year starts on a Tuesday, so week 1 starts in 2018.
-            datetime.date(2018, 12, 30),
-        )
-        self.assertEqual(
-            pathogens.pathogens["influenza"].parse_mmwr_week(2018, 1),
+            (2019, 1, datetime.date(2018, 12, 30)),
             # Year starts on a Monday, so week 1 starts in 2017.
-            datetime.date(2017, 12, 31),
-        )
-        self.assertEqual(
-            pathogens.pathogens["influenza"].parse_mmwr_week(2017, 1),
+            (2018, 1, datetime.date(2017, 12, 31)),
             # Year starts on a Sunday, so week 1 starts in 2017.
-            datetime.date(2017, 1, 1),
-        )
-        self.assertEqual(
-            pathogens.pathogens["influenza"].parse_mmwr_week(2016, 1),
+            (2017, 1, datetime.date(2017, 1, 1)),
             # Year starts on a Friday, so week 1 starts in 2016.
-            datetime.date(2016, 1, 3),
-        )
-        self.assertEqual(
-            pathogens.pathogens["influenza"].parse_mmwr_week(2015, 1),
+            (2016, 1, datetime.date(2016, 1, 3)),
             # Year starts on a Thursday, so week 1 starts in 2016.
-            datetime.date(2015, 1, 4),
-        )
-
-
-class TestVaribles(unittest.TestCase):
-    def test_date_parsing(self):
-        v = Variable(date="2019")
-        self.assertEqual(
-            v.get_dates(),
-            (datetime.date(2019, 1, 1), datetime.date(2019, 12, 31)),
-        )
-
-        v = Variable(date="2019-02")
-        self.assertEqual(
-            v.get_dates(),
-            (datetime.date(2019, 2, 1), datetime.date(2019, 2, 28)),
-        )
-
-        v = Variable(date="2020-02")
-        self.assertEqual(
-            v.get_dates(),
-            (datetime.date(2020, 2, 1), datetime.date(2020, 2, 29)),
-        )
-
-        v = Variable(date="2020-02-01")
-        self.assertEqual(
-            v.get_dates(),
-            (datetime.date(2020, 2, 1), datetime.date(2020, 2, 1)),
-        )
-
-        v = Variable(start_date="2020-01", end_date="2020-02")
-        self.assertEqual(
-            v.get_dates(),
-            (datetime.date(2020, 1, 1), datetime.date(2020, 2, 29)),
-        )
-
-        v = Variable(start_date="2020-01-07", end_date="2020-02-06")
-        self.assertEqual(
-            v.get_dates(),
-            (datetime.date(2020, 1, 7), datetime.date(2020, 2, 6)),
-        )
-
-        v1 = Variable(date="2019")
-        v2 = Variable(date="2020", date_source=v1)
-        self.assertEqual(
-            v2.get_dates(),
-            (datetime.date(2019, 1, 1), datetime.date(2019, 12, 31)),
+            (2015, 1, datetime.date(2015, 1, 4)),
+        ],
+        ids=["wednesday", "tuesday", "monday", "sunday", "friday", "thursday"],
+    )
+    def test_mmwr_week(self, year, week, expected):
+        assert (
+            pathogens.pathogens["influenza"].parse_mmwr_week(year, week)
+            == expected
         )
 
-        with self.assertRaises(Exception):
-            Variable(start_date="2020-01-07")
-
-        with self.assertRaises(Exception):
-            Variable(end_date="2020-01-07")
-
-        with self.assertRaises(Exception):
-            Variable(start_date="2020-01-07", date="2020")
 
-        with self.assertRaises(Exception):
-            Variable(end_date="2020-01-07", date="2020")
-
-        with self.assertRaises(Exception):
-            Variable(start_date="2020-01-07", end_date="2020-01-06")
-
-        with self.assertRaises(Exception):
-            Variable(date="2020-1")
-
-        with self.assertRaises(Exception):
-            Variable(date="2020/1/1")
-
-        with self.assertRaises(Exception):
-            Variable(date="2020/01/01")
-
-        v = Variable(date="2020")
-        with self.assertRaises(AssertionError):
-            v.get_date()  # asserts start==end
+class TestVaribles:
+    @pytest.mark.parametrize(
+        "kwargs,expected",
+        [
+            (
+                dict(date="2019"),
+                (datetime.date(2019, 1, 1), datetime.date(2019, 12, 31)),
+            ),
+            (
+                dict(date="2019-02"),
+                (datetime.date(2019, 2, 1), datetime.date(2019, 2, 28)),
+            ),
+            (
+                dict(date="2020-02"),
+                (datetime.date(2020, 2, 1), datetime.date(2020, 2, 29)),
+            ),
+            (
+                dict(date="2020-02-01"),
+                (datetime.date(2020, 2, 1), datetime.date(2020, 2, 1)),
+            ),
+            (
+                dict(start_date="2020-01", end_date="2020-02"),
+                (datetime.date(2020, 1, 1), datetime.date(2020, 2, 29)),
+            ),
+            (
+                dict(start_date="2020-01-07", end_date="2020-02-06"),
+                (datetime.date(2020, 1, 7), datetime.date(2020, 2, 6)),
+            ),
+            (
+                dict(date="2020", date_source=Variable(date="2019")),
+                (datetime.date(2019, 1, 1), datetime.date(2019, 12, 31)),
+            ),
+        ],
+        ids=[
+            "year",
+            "month",
+            "leap-month",
+            "day",
+            "month-range",
+            "day-range",
+            "date-source",
+        ],
+    )
+    def test_date_parsing(self, kwargs, expected):
+        assert Variable(**kwargs).get_dates() == expected
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            dict(start_date="2020-01-07"),
+            dict(end_date="2020-01-07"),
+            dict(start_date="2020-01-07", date="2020"),
+            dict(end_date="2020-01-07", date="2020"),
+            dict(start_date="2020-01-07", end_date="2020-01-06"),
+            dict(date="2020-1"),
+            dict(date="2020/1/1"),
+            dict(date="2020/01/01"),
+        ],
+        ids=[
+            "start-only",
+            "end-only",
+            "start-and-date",
+            "end-and-date",
+            "end-before-start",
+            "unpadded-month",
+            "slashes-unpadded",
+            "slashes",
+        ],
+    )
+    def test_invalid_dates(self, kwargs):
+        with pytest.raises(Exception):
+            Variable(**kwargs)
+
+    @pytest.mark.parametrize(
+        "kwargs,method",
+        [
+            # get_date() asserts start==end
+            (dict(date="2020"), "get_date"),
+            # get_dates() asserts dates are set
+            (dict(), "get_dates"),
+        ],
+        ids=["get-date-range", "get-dates-unset"],
+    )
+    def test_date_assertions(self, kwargs, method):
+        v = Variable(**kwargs)
+        with pytest.raises(AssertionError):
+            getattr(v, method)()
 
+    def test_dates_unset(self):
         v = Variable()
-        self.assertIsNone(v.parsed_start)
-        self.assertIsNone(v.parsed_end)
-        with self.assertRaises(AssertionError):
-            v.get_dates()  # asserts dates are set
+        assert v.parsed_start is None
+        assert v.parsed_end is None
 
     def test_locations(self):
         v1 = Variable(
             country="United States", state="Ohio", county="Franklin County"
         )
-        self.assertEqual(
-            ("United States", "Ohio", "Franklin County"), v1.get_location()
+        assert v1.get_location() == (
+            "United States",
+            "Ohio",
+            "Franklin County",
         )
 
         v2 = Variable(
@@ -244,371 +268,409 @@ class TestVaribles(unittest.TestCase):
         )
 
         # Conflicting locations with no resolution specified.
-        with self.assertRaises(ValueError):
+        with pytest.raises(ValueError):
             Variable(inputs=[v1, v2])
 
         v3 = Variable(inputs=[v1, v2], location_source=v1)
-        self.assertEqual(
-            ("United States", "Ohio", "Franklin County"), v3.get_location()
+        assert v3.get_location() == (
+            "United States",
+            "Ohio",
+            "Franklin County",
         )
 
 
-class TestMGS(unittest.TestCase):
-    repo = mgs.GitHubRepo(**mgs.MGS_REPO_DEFAULTS)
-
-    def test_load_bioprojects(self):
-        bps = mgs.load_bioprojects(self.repo)
+class TestMGS:
+    def test_load_bioprojects(self, mgs_data):
         for study, study_bps in mgs.target_bioprojects.items():
-            with self.subTest(study=study):
-                for bp in study_bps:
-                    self.assertIn(bp, bps)
+            for bp in study_bps:
+                assert bp in mgs_data.bioprojects, study
 
-    def test_load_sample_attributes(self):
-        samples = mgs.load_sample_attributes(self.repo)
+    def test_load_sample_attributes(self, mgs_data):
+        sample_attributes = mgs_data.sample_attrs
         s1 = mgs.Sample("SRR14530726")  # Randomly picked Rothman sample
         s2 = mgs.Sample("SRR23083716")  # Randomly picked Spurbeck sample
-        self.assertIn(s1, samples)
-        self.assertIn(s2, samples)
-        attrs = samples[s1]
-        self.assertEqual(attrs.country, "United States")
-        self.assertEqual(attrs.state, "California")
-        self.assertEqual(attrs.county, "San Diego County")
-        self.assertEqual(attrs.date, datetime.date(2020, 8, 27))
-        self.assertEqual(attrs.enrichment, mgs.Enrichment.VIRAL)
-        self.assertIsNone(attrs.method)
-        self.assertEqual(samples[s2].method, "IJ")
-
-    def test_load_sample_counts(self):
-        sample_counts = mgs.load_sample_counts(self.repo)
+        assert s1 in sample_attributes
+        assert s2 in sample_attributes
+        attrs = sample_attributes[s1]
+        assert attrs.country == "United States"
+        assert attrs.state == "California"
+        assert attrs.county == "San Diego County"
+        assert attrs.date == datetime.date(2020, 8, 27)
+        assert attrs.enrichment == mgs.Enrichment.VIRAL
+        assert attrs.method is None
+        assert sample_attributes[s2].method == "IJ"
+
+    def test_load_sample_counts(self, mgs_data):
         for p in ["sars_cov_2", "hiv"]:
-            with self.subTest(pathogen=p):
-                for taxid in pathogens.pathogens[p].pathogen_chars.taxids:
-                    self.assertIn(taxid, sample_counts)
-
-class TestWeightedAverageByPopulation(unittest.TestCase):
-    def test_weightedAverageByPopulation(self):
+            for taxid in pathogens.pathogens[p].pathogen_chars.taxids:
+                assert taxid in mgs_data.read_counts, p
+
+
+class TestWeightedAverageByPopulation:
+    @pytest.mark.parametrize("n", [4, 64, 1024])
+    def test_weightedAverageByPopulation(self, n):
+        dates = [
+            (
+                datetime.date(2000, 1, 1) + datetime.timedelta(days=i)
+            ).isoformat()
+            for i in range(n)
+        ]
         prevalences = [
             Prevalence(
                 infections_per_100k=i,
-                date="2000-01-0%s" % i,
+                date=date,
                 active=Active.ACTIVE,
             )
-            for i in range(1, 5)
+            for i, date in enumerate(dates, start=1)
         ]
-        populations = [
+        population_sizes = [
             Population(
                 people=100_000 * i,
-                date="2000-01-0%s" % i,
+                date=date,
             )
-            for i in range(1, 5)
+            for i, date in enumerate(dates, start=1)
         ]
-        self.assertAlmostEqual(
-            (1 * 100_000 + 2 * 200_000 + 3 * 300_000 + 4 * 400_000)
-            / (100_000 * (1 + 2 + 3 + 4)),
-            Prevalence.weightedAverageByPopulation(
-                *zip(prevalences, populations)
-            ).infections_per_100k,
-        )
+        i = np.arange(1, n + 1, dtype=np.float64)
+        expected = float((i * (100_000 * i)).sum() / (100_000 * i).sum())
+        assert Prevalence.weightedAverageByPopulation(
+            *zip(prevalences, population_sizes)
+        ).infections_per_100k == pytest.approx(expected)
 
 
-class TestMGSData(unittest.TestCase):
-    mgs_data = mgs.MGSData.from_repo()
+@pytest.fixture
+def rothman_bioproject():
     (bioproject,) = mgs.target_bioprojects["rothman"]
-    sample = mgs.Sample("SRR14530726")  # Random Rothman sample
-    taxids = pathogens.pathogens["norovirus"].pathogen_chars.taxids
+    return bioproject
 
-    def test_from_repo(self):
-        self.assertIsInstance(mgs.MGSData.from_repo(), mgs.MGSData)
 
-    def test_sample_attributes(self):
-        samples = self.mgs_data.sample_attributes(self.bioproject)
-        self.assertIn(self.sample, samples)
-        self.assertIsInstance(samples[self.sample], mgs.SampleAttributes)
+@pytest.fixture
+def rothman_sample():
+    return mgs.Sample("SRR14530726")  # Random Rothman sample
 
-    def test_total_reads(self):
-        reads = self.mgs_data.total_reads(self.bioproject)
-        self.assertIn(self.sample, reads)
-        self.assertIsInstance(reads[self.sample], int)
 
-    def test_viral_reads(self):
-        reads = self.mgs_data.viral_reads(self.bioproject, self.taxids)
-        self.assertIn(self.sample, reads)
-        self.assertIsInstance(reads[self.sample], int)
+@pytest.fixture
+def norovirus_taxids():
+    return pathogens.pathogens["norovirus"].pathogen_chars.taxids
 
 
-class TestPopulations(unittest.TestCase):
-    def test_county_state(self):
-        self.assertEqual(
-            populations.us_population(
-                county="Bristol County", state="Rhode Island", year=2020
-            ),
-            Population(
-                people=50_774,
-                date="2020-07-01",
-                source="https://www.census.gov/data/tables/time-series/demo/popest/2020s-counties-total.html",
-                country="United States",
-                state="Rhode Island",
-                county="Bristol County",
-            ),
-        )
+def test_from_repo():
+    assert isinstance(mgs.MGSData.from_repo(), mgs.MGSData)
 
-        self.assertEqual(
-            populations.us_population(
-                county="Bristol County", state="Rhode Island", year=2020
-            ).people,
-            50_774,
-        )
-        self.assertEqual(
-            populations.us_population(
-                county="Bristol County", state="Rhode Island", year=2021
-            ).people,
-            50_800,
-        )
-        self.assertEqual(
-            populations.us_population(
-                county="Bristol County", state="Rhode Island", year=2022
-            ).people,
-            50_360,
-        )
 
-        self.assertEqual(
-            populations.us_population(
-                county="Southeastern Connecticut Planning Region",
-                state="Connecticut",
-                year=2022,
-            ).people,
-            280_403,
-        )
+def test_sample_attributes(mgs_data, rothman_bioproject, rothman_sample):
+    samples = mgs_data.sample_attributes(rothman_bioproject)
+    assert rothman_sample in samples
+    assert isinstance(samples[rothman_sample], mgs.SampleAttributes)
 
-    def test_state(self):
-        self.assertEqual(
-            populations.us_population(state="California", year=2022),
-            Population(
+
+def test_total_reads(mgs_data, rothman_bioproject, rothman_sample):
+    reads = mgs_data.total_reads(rothman_bioproject)
+    assert rothman_sample in reads
+    assert isinstance(reads[rothman_sample], int)
+
+
+def test_viral_reads(
+    mgs_data, rothman_bioproject, rothman_sample, norovirus_taxids
+):
+    reads = mgs_data.viral_reads(rothman_bioproject, norovirus_taxids)
+    assert rothman_sample in reads
+    assert isinstance(reads[rothman_sample], int)
+
+
+CENSUS_SOURCE = "https://www.census.gov/data/tables/time-series/demo/popest/2020s-counties-total.html"
+
+
+def _us_population(**kwargs):
+    return Population(source=CENSUS_SOURCE, country="United States", **kwargs)
+
+
+class TestPopulations:
+    @pytest.mark.parametrize(
+        "kwargs,expected",
+        [
+            (
+                dict(county="Bristol County", state="Rhode Island", year=2020),
+                _us_population(
+                    people=50_774,
+                    date="2020-07-01",
+                    state="Rhode Island",
+                    county="Bristol County",
+                ),
+            ),
+            (
+                dict(state="California", year=2022),
                 # From https://www.census.gov/quickfacts/CA
-                people=39_029_342,
-                date="2022-07-01",
-                source="https://www.census.gov/data/tables/time-series/demo/popest/2020s-counties-total.html",
-                country="United States",
-                state="California",
+                _us_population(
+                    people=39_029_342, date="2022-07-01", state="California"
+                ),
             ),
-        )
-
-    def test_country(self):
-        self.assertEqual(
-            populations.us_population(year=2022),
-            Population(
+            (
+                dict(year=2022),
                 # https://www.census.gov/quickfacts/USA
-                people=333_287_557,
-                date="2022-07-01",
-                source="https://www.census.gov/data/tables/time-series/demo/popest/2020s-counties-total.html",
-                country="United States",
+                _us_population(people=333_287_557, date="2022-07-01"),
             ),
+        ],
+        ids=["county-state", "state", "country"],
+    )
+    def test_us_population(self, kwargs, expected):
+        assert populations.us_population(**kwargs) == expected
+
+    @pytest.mark.parametrize(
+        "county,state,year,expected_people",
+        [
+            ("Bristol County", "Rhode Island", 2020, 50_774),
+            ("Bristol County", "Rhode Island", 2021, 50_800),
+            ("Bristol County", "Rhode Island", 2022, 50_360),
+            (
+                "Southeastern Connecticut Planning Region",
+                "Connecticut",
+                2022,
+                280_403,
+            ),
+        ],
+        ids=[
+            "bristol-2020",
+            "bristol-2021",
+            "bristol-2022",
+            "southeastern-connecticut-2022",
+        ],
+    )
+    def test_county_state_people(self, county, state, year, expected_people):
+        assert (
+            populations.us_population(
+                county=county, state=state, year=year
+            ).people
+            == expected_people
         )
 
 
-class TestStats(unittest.TestCase):
-    attrs = mgs.SampleAttributes(
+def _build_sars_cov_2_model(mgs_data, all_estimates):
+    pathogen = pathogens.pathogens["sars_cov_2"]
+    bioprojects = mgs.target_bioprojects["rothman"]
+    _, incidences = all_estimates["sars_cov_2"]
+    taxids, predictors = next(
+        iter(by_taxids(pathogen.pathogen_chars, incidences).items())
+    )
+    model = stats.build_model(
+        mgs_data,
+        bioprojects,
+        predictors,
+        taxids,
+        random_seed=1,
+        enrichment=mgs.Enrichment.VIRAL,
+    )
+    assert model is not None
+    return model
+
+
+@pytest.fixture(scope="module")
+def unfitted_model(mgs_data, all_estimates):
+    return _build_sars_cov_2_model(mgs_data, all_estimates)
+
+
+# A separate model from unfitted_model, so the two tests don't depend on the
+# order they run in.  pystan caches the compiled program, so building it
+# again is cheap.  We only need a fit to exist, not a good one.
+@pytest.fixture(scope="module")
+def fitted_model(mgs_data, all_estimates):
+    model = _build_sars_cov_2_model(mgs_data, all_estimates)
+    model.fit_model(num_chains=1, num_samples=1, num_warmup=0)
+    return model
+
+
+ATTRS = mgs.SampleAttributes(
+    country="United States",
+    state="Pennsylvania",
+    county="Allegheny County",
+    date=datetime.date.fromisoformat("2019-05-14"),
+    reads=100,
+    location="Loc",
+    enrichment=mgs.Enrichment.VIRAL,
+)
+
+LOOKUP_VARIABLES = {
+    "v1": Variable(country="United States", date="2019"),
+    "v2": Variable(country="United States", date="2019-05-14"),
+    "v3": Variable(country="United States", date="2019-05-15"),
+    "v4": Variable(country="United States", date="2019-05-16"),
+    "v5": Variable(country="United States", date="2019-05-31"),
+    "v6": Variable(country="United States", state="Pennsylvania", date="2019"),
+    "v7": Variable(
         country="United States",
         state="Pennsylvania",
         county="Allegheny County",
-        date=datetime.date.fromisoformat("2019-05-14"),
-        reads=100,
-        location="Loc",
-        enrichment=mgs.Enrichment.VIRAL,
+        date="2019",
+    ),
+}
+
+
+class TestStats:
+    @pytest.mark.parametrize(
+        "variable,expected_quality",
+        [
+            (Variable(country="United States", date="2019"), 0),
+            (Variable(country="United States", date="2019-05-14"), 0),
+            # One day off, so -1.
+            (Variable(country="United States", date="2019-05-15"), -1),
+            (
+                Variable(
+                    country="United States",
+                    start_date="2019-05-01",
+                    end_date="2019-06-02",
+                ),
+                0,
+            ),
+            # Higher score for state and county match.
+            (
+                Variable(
+                    country="United States",
+                    state="Pennsylvania",
+                    county="Allegheny County",
+                    date="2019",
+                ),
+                30,
+            ),
+            (
+                Variable(
+                    country="United States",
+                    state="Pennsylvania",
+                    county="Beaver County",
+                    date="2019",
+                ),
+                None,
+            ),
+            (
+                Variable(
+                    country="United States",
+                    state="Ohio",
+                    county="Lake County",
+                    date="2019",
+                ),
+                None,
+            ),
+        ],
+        ids=[
+            "year",
+            "exact-day",
+            "day-off",
+            "range",
+            "county",
+            "other-county",
+            "other-state",
+        ],
+    )
+    def test_match_quality(self, variable, expected_quality):
+        assert stats.match_quality(ATTRS, variable) == expected_quality
+
+    @pytest.mark.parametrize(
+        "names,expected_names",
+        [
+            (["v1", "v3"], ["v1"]),
+            # Prefer v2 to v3 because it's an exact match.
+            (["v2", "v3"], ["v2"]),
+            (["v3", "v1"], ["v1"]),
+            (["v1", "v2"], ["v1", "v2"]),
+            # Accept v3 because it's pretty close (one day off).
+            (["v3"], ["v3"]),
+            # Prefer v3 over v4 because it's closer.
+            (["v3", "v4"], ["v3"]),
+            # Don't accept v5 because it's too far off.
+            (["v5"], []),
+            # Prefer state match over general country
+            (["v1", "v6"], ["v6"]),
+            # Prefer county match over state
+            (["v6", "v7"], ["v7"]),
+        ],
+        ids=lambda names: "+".join(names) or "none",
     )
+    def test_lookup_variables(self, names, expected_names):
+        variables = [LOOKUP_VARIABLES[name] for name in names]
+        expected = [LOOKUP_VARIABLES[name] for name in expected_names]
+        assert stats.lookup_variables(ATTRS, variables) == expected
+
+    @pytest.mark.parametrize("pathogen_name,study", MODEL_CASES)
+    def test_build_model(
+        self,
+        mgs_data,
+        bioproject_samples,
+        predictors_by_pathogen,
+        pathogen_name,
+        study,
+    ):
+        bioprojects = mgs.target_bioprojects[study]
+        enrichment = None if study == "brinch" else mgs.Enrichment.VIRAL
+        all_sample_attributes = {}
+        for bioproject in bioprojects:
+            all_sample_attributes.update(
+                bioproject_samples[bioproject, enrichment]
+            )
+        for predictor_type, taxids, predictors in predictors_by_pathogen[
+            pathogen_name
+        ]:
+            model = stats.build_model(
+                mgs_data,
+                bioprojects,
+                predictors,
+                taxids,
+                random_seed=1,
+                enrichment=enrichment,
+            )
+            # No matching data
+            if model is None:
+                continue
+            assert len(model.data) == len(all_sample_attributes), (
+                predictor_type,
+                taxids,
+            )
 
-    def test_match_quality(self):
-        v1 = Variable(country="United States", date="2019")
-        self.assertEqual(stats.match_quality(self.attrs, v1), 0)
-        v2 = Variable(country="United States", date="2019-05-14")
-        self.assertEqual(stats.match_quality(self.attrs, v2), 0)
-        v3 = Variable(country="United States", date="2019-05-15")
-        # One day off, so -1.
-        self.assertEqual(stats.match_quality(self.attrs, v3), -1)
-        v4 = Variable(
-            country="United States",
-            start_date="2019-05-01",
-            end_date="2019-06-02",
-        )
-        self.assertEqual(stats.match_quality(self.attrs, v4), 0)
-        v5 = Variable(
-            country="United States",
-            state="Pennsylvania",
-            county="Allegheny County",
-            date="2019",
-        )
-        # Higher score for state and county match.
-        self.assertEqual(stats.match_quality(self.attrs, v5), 30)
-        v6 = Variable(
-            country="United States",
-            state="Pennsylvania",
-            county="Beaver County",
-            date="2019",
-        )
-        self.assertIsNone(stats.match_quality(self.attrs, v6))
-        v7 = Variable(
-            country="United States",
-            state="Ohio",
-            county="Lake County",
-            date="2019",
-        )
-        self.assertIsNone(stats.match_quality(self.attrs, v7))
-
-    def test_lookup_variables(self):
-        v1 = Variable(country="United States", date="2019")
-        v2 = Variable(country="United States", date="2019-05-14")
-        v3 = Variable(country="United States", date="2019-05-15")
-        v4 = Variable(country="United States", date="2019-05-16")
-        v5 = Variable(country="United States", date="2019-05-31")
-        v6 = Variable(
-            country="United States", state="Pennsylvania", date="2019"
-        )
-        v7 = Variable(
-            country="United States",
-            state="Pennsylvania",
-            county="Allegheny County",
-            date="2019",
-        )
+    def test_pre_fit_raises(self, unfitted_model):
+        assert unfitted_model.fit is None
+        assert unfitted_model.output_df is None
+        with pytest.raises(ValueError):
+            unfitted_model.get_output_by_sample()
+        with pytest.raises(ValueError):
+            unfitted_model.get_coefficients()
 
-        self.assertEqual(stats.lookup_variables(self.attrs, [v1, v3]), [v1])
-        # Prefer v2 to v3 because it's an exact match.
-        self.assertEqual(stats.lookup_variables(self.attrs, [v2, v3]), [v2])
-        self.assertEqual(stats.lookup_variables(self.attrs, [v3, v1]), [v1])
-        self.assertEqual(
-            stats.lookup_variables(self.attrs, [v1, v2]), [v1, v2]
-        )
-        # Accept v3 because it's pretty close (one day off).
-        self.assertEqual(stats.lookup_variables(self.attrs, [v3]), [v3])
-        # Prefer v3 over v4 because it's closer.
-        self.assertEqual(stats.lookup_variables(self.attrs, [v3, v4]), [v3])
-        # Don't accept v5 because it's too far off.
-        self.assertEqual(stats.lookup_variables(self.attrs, [v5]), [])
-
-        # Prefer state match over general country
-        self.assertEqual(stats.lookup_variables(self.attrs, [v1, v6]), [v6])
-
-        # Prefer county match over state
-        self.assertEqual(stats.lookup_variables(self.attrs, [v6, v7]), [v7])
-
-    def test_build_model(self):
-        mgs_data = mgs.MGSData.from_repo()
-        for (
-            pathogen_name,
-            tidy_name,
-            predictor_type,
-            taxids,
-            predictors,
-        ) in pathogens.predictors_by_taxid():
-            for study, bioprojects in mgs.target_bioprojects.items():
-                with self.subTest(
-                    pathogen=pathogen_name,
-                    taxids=taxids,
-                    predictor=predictor_type,
-                    study=study,
-                ):
-                    enrichment = (
-                        None if study == "brinch" else mgs.Enrichment.VIRAL
-                    )
-                    model = stats.build_model(
-                        mgs_data,
-                        bioprojects,
-                        predictors,
-                        taxids,
-                        random_seed=1,
-                        enrichment=enrichment,
-                    )
-                    # No matching data
-                    if model is None:
-                        continue
-                    all_sample_attributes = {}
-                    for bioproject in bioprojects:
-                        all_sample_attributes.update(
-                            mgs_data.sample_attributes(
-                                bioproject,
-                                enrichment=enrichment,
-                            )
-                        )
-                    self.assertEqual(
-                        len(model.data), len(all_sample_attributes)
-                    )
+    def test_post_fit_has_outputs(self, fitted_model):
+        assert fitted_model.fit is not None
+        assert fitted_model.output_df is not None
+        fitted_model.get_output_by_sample()
+        fitted_model.get_coefficients()
 
-    def test_fit_model(self):
-        mgs_data = mgs.MGSData.from_repo()
-        pathogen = pathogens.pathogens["sars_cov_2"]
-        bioprojects = mgs.target_bioprojects["rothman"]
-        taxids, predictors = next(
-            iter(
-                by_taxids(
-                    pathogen.pathogen_chars,
-                    pathogen.estimate_incidences(),
-                ).items()
-            )
-        )
-        model = stats.build_model(
-            mgs_data,
-            bioprojects,
-            predictors,
-            taxids,
-            random_seed=1,
-            enrichment=mgs.Enrichment.VIRAL,
-        )
-        assert model is not None
-        self.assertIsNone(model.fit)
-        self.assertIsNone(model.output_df)
-        with self.assertRaises(ValueError):
-            model.get_output_by_sample()
-        with self.assertRaises(ValueError):
-            model.get_coefficients()
-        model.fit_model(num_chains=1, num_samples=1)
-        self.assertIsNotNone(model.fit)
-        self.assertIsNotNone(model.output_df)
-        model.get_output_by_sample()
-        model.get_coefficients()
-
-
-class TestPathogensMatchStudies(unittest.TestCase):
-    def test_pathogens_match_studies(self):
+
+class TestPathogensMatchStudies:
+    @pytest.mark.parametrize(
+        "pathogen_name,study,bioproject", BIOPROJECT_CASES
+    )
+    def test_pathogens_match_studies(
+        self,
+        bioproject_samples,
+        predictors_by_pathogen,
+        pathogen_name,
+        study,
+        bioproject,
+    ):
         # Every pathogen should have at least one estimate for every sample
         # in the projects we're working with.
-        mgs_data = mgs.MGSData.from_repo()
-        for (
-            pathogen_name,
-            tidy_name,
-            predictor_type,
-            taxids,
-            predictors,
-        ) in pathogens.predictors_by_taxid():
-            for study, bioprojects in mgs.target_bioprojects.items():
-                for bioproject in bioprojects:
-                    with self.subTest(
-                        pathogen=pathogen_name,
-                        taxids=taxids,
-                        predictor=predictor_type,
-                        study=study,
-                        bioproject=bioproject,
-                    ):
-                        enrichment = (
-                            None if study == "brinch" else mgs.Enrichment.VIRAL
-                        )
-                        chosen_predictors = {
-                            sample: stats.lookup_variables(attrs, predictors)
-                            for sample, attrs in mgs_data.sample_attributes(
-                                bioproject, enrichment=enrichment
-                            ).items()
-                        }
-                        # It's ok to have no data at all.
-                        # We just can't handle partial data at the moment.
-                        if all(ps == [] for ps in chosen_predictors.values()):
-                            continue
-                        for sample, preds in chosen_predictors.items():
-                            with self.subTest(sample=sample):
-                                self.assertNotEqual(preds, [])
-                                for predictor in preds:
-                                    with self.subTest(predictor=predictor):
-                                        self.assertGreater(
-                                            predictor.get_data(), 0
-                                        )
-
-
-if __name__ == "__main__":
-    unittest.main()
+        enrichment = None if study == "brinch" else mgs.Enrichment.VIRAL
+        samples = bioproject_samples[bioproject, enrichment]
+        for predictor_type, taxids, predictors in predictors_by_pathogen[
+            pathogen_name
+        ]:
+            chosen_predictors = {
+                sample: stats.lookup_variables(attrs, predictors)
+                for sample, attrs in samples.items()
+            }
+            # It's ok to have no data at all.
+            # We just can't handle partial data at the moment.
+            if all(ps == [] for ps in chosen_predictors.values()):
+                continue
+            for sample, preds in chosen_predictors.items():
+                assert preds != [], (predictor_type, taxids, sample)
+                for predictor in preds:
+                    assert predictor.get_data() > 0, (
+                        predictor_type,
+                        taxids,
+                        sample,
+                        predictor,
+                    )